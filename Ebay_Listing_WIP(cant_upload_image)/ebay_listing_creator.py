@@ -2,6 +2,8 @@ import os
 import csv
 import base64
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import json
@@ -9,10 +11,31 @@ import re
 import cloudinary
 import cloudinary.uploader
 from cloudinary.utils import cloudinary_url
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 # Load environment variables
 load_dotenv()
 
+# Front and back images are uploaded in parallel
+UPLOAD_WORKERS = 2
+
+# Fields read from the Trading API XML response
+ITEM_ID_PATTERN = re.compile(r'<ItemID>(\d+)</ItemID>')
+SHORT_MESSAGE_PATTERN = re.compile(r'<ShortMessage>(.*?)</ShortMessage>')
+LONG_MESSAGE_PATTERN = re.compile(r'<LongMessage>(.*?)</LongMessage>')
+
+# Map condition to eBay condition ID
+CONDITION_IDS = {
+    'NM': 3000,  # Used
+    'MT': 1000,  # New
+    'EX': 3000,  # Used
+    'GD': 3000,  # Used
+    'LP': 3000,  # Used
+    'PL': 4000,  # Very Good
+    'PO': 5000   # Good
+}
+
 class EbayListingCreator:
     """Create eBay listings for Pokemon cards using CardMarket data and Cloudinary for images"""
     
@@ -40,6 +63,14 @@ class EbayListingCreator:
         
         self.access_token = None
         
+        # Image folder listings, read once and reused for every card
+        self.folder_listings = {}
+        
+        # One keep-alive session so every listing reuses the same TLS connection
+        self.session = requests.Session()
+        retries = Retry(total=3, backoff_factor=1, status_forcelist=(500, 502, 503, 504))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=retries))
+        
         if not all([self.app_id, self.dev_id, self.cert_id]):
             raise ValueError("Missing eBay API credentials in .env file")
         
@@ -109,7 +140,9 @@ class EbayListingCreator:
             print(f"  ⚠️  Images folder doesn't exist: {images_folder}")
             return None, None
         
-        all_files = os.listdir(images_folder)
+        all_files = self.folder_listings.get(images_folder)
+        if all_files is None:
+            all_files = self.folder_listings[images_folder] = os.listdir(images_folder)
         print(f"  🔍 Searching for card #{card_num_normalized} in set {set_code}")
         
         for filename in all_files:
@@ -212,18 +245,11 @@ class EbayListingCreator:
         """Create an eBay listing using Trading API with Cloudinary-hosted images"""
         print(f"\n📝 Creating listing for: {card_data['name']}")
         
-        # Upload images to Cloudinary
-        image_urls = []
-        
-        if front_image_path:
-            front_url = self.upload_to_cloudinary(front_image_path, card_data)
-            if front_url:
-                image_urls.append(front_url)
-        
-        if back_image_path:
-            back_url = self.upload_to_cloudinary(back_image_path, card_data)
-            if back_url:
-                image_urls.append(back_url)
+        # Upload front and back to Cloudinary at the same time, keeping their order
+        image_paths = [path for path in (front_image_path, back_image_path) if path]
+        with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+            uploaded = executor.map(lambda path: self.upload_to_cloudinary(path, card_data), image_paths)
+            image_urls = [url for url in uploaded if url]
         
         if not image_urls:
             print("  ✗ No images available, skipping listing")
@@ -249,17 +275,7 @@ class EbayListingCreator:
         base_price = float(card_data.get('price', '0.02'))
         listing_price = max(base_price * 1.5, 0.99)  # 50% markup, minimum €0.99
         
-        # Map condition to eBay condition ID
-        condition_map = {
-            'NM': 3000,  # Used
-            'MT': 1000,  # New
-            'EX': 3000,  # Used
-            'GD': 3000,  # Used
-            'LP': 3000,  # Used
-            'PL': 4000,  # Very Good
-            'PO': 5000   # Good
-        }
-        condition_id = condition_map.get(card_data['condition'], 3000)
+        condition_id = CONDITION_IDS.get(card_data['condition'], 3000)
         
         # Build picture URLs XML
         picture_urls_xml = '\n                    '.join([f'<PictureURL>{url}</PictureURL>' for url in image_urls])
@@ -330,25 +346,27 @@ class EbayListingCreator:
                 print("\n===== FULL XML REQUEST SENT TO EBAY =====")
                 print(xml_request)
                 print("==========================================\n")
-                response = requests.post(self.trading_url, data=xml_request.encode('utf-8'), headers=headers)
+                response = self.session.post(self.trading_url, data=xml_request.encode('utf-8'), headers=headers)
+                # response.text decodes the body again on every access
+                response_text = response.text
                 
-                if '<Ack>Success</Ack>' in response.text:
-                    item_id_match = re.search(r'<ItemID>(\d+)</ItemID>', response.text)
+                if '<Ack>Success</Ack>' in response_text:
+                    item_id_match = ITEM_ID_PATTERN.search(response_text)
                     item_id = item_id_match.group(1) if item_id_match else 'Unknown'
                     print(f"  ✓ Listing created successfully! Item ID: {item_id}")
                     print(f"  🔗 View at: https://www.ebay.fr/itm/{item_id}")
                     return True
                 else:
                     print(f"  ✗ Error creating listing")
-                    error_match = re.search(r'<ShortMessage>(.*?)</ShortMessage>', response.text)
+                    error_match = SHORT_MESSAGE_PATTERN.search(response_text)
                     if error_match:
                         print(f"  ✗ Error: {error_match.group(1)}")
-                    long_error = re.search(r'<LongMessage>(.*?)</LongMessage>', response.text)
+                    long_error = LONG_MESSAGE_PATTERN.search(response_text)
                     if long_error:
                         print(f"  ✗ Details: {long_error.group(1)}")
                     # Save full response for debugging
                     with open('ebay_error_response.xml', 'w', encoding='utf-8') as f:
-                        f.write(response.text)
+                        f.write(response_text)
                     print(f"  ℹ️  Full error saved to ebay_error_response.xml")
                     return False
             else:
@@ -379,44 +397,47 @@ class EbayListingCreator:
         print(f"\n📄 Reading CSV: {csv_path}")
         print(f"🖼️ Images folder: {images_folder}")
         
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            cards = list(reader)
+        # Count the rows up front so the cards themselves can be streamed
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            total_cards = max(sum(1 for row in csv.reader(f) if row) - 1, 0)
         
         if test_mode:
-            print(f"\n⚠️  TEST MODE: Processing only the FIRST card out of {len(cards)} total")
-            cards = cards[:1]
+            print(f"\n⚠️  TEST MODE: Processing only the FIRST card out of {total_cards} total")
+            total_cards = min(total_cards, 1)
         else:
-            print(f"\n✓ Found {len(cards)} cards to list")
+            print(f"\n✓ Found {total_cards} cards to list")
         
         successful = 0
         failed = 0
         
-        for i, card_data in enumerate(cards, 1):
-            print(f"\n{'='*70}")
-            print(f"[{i}/{len(cards)}] Processing: {card_data['name']} (#{card_data['cn']})")
-            print('='*70)
-            
-            # Find images using card number
-            front_image, back_image = self.find_card_images_by_number(
-                card_data['cn'],
-                card_data['setCode'],
-                images_folder
-            )
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            cards = islice(csv.DictReader(f), total_cards)
             
-            if front_image:
-                if self.create_ebay_listing(card_data, front_image, back_image):
-                    successful += 1
+            for i, card_data in enumerate(cards, 1):
+                print(f"\n{'='*70}")
+                print(f"[{i}/{total_cards}] Processing: {card_data['name']} (#{card_data['cn']})")
+                print('='*70)
+                
+                # Find images using card number
+                front_image, back_image = self.find_card_images_by_number(
+                    card_data['cn'],
+                    card_data['setCode'],
+                    images_folder
+                )
+                
+                if front_image:
+                    if self.create_ebay_listing(card_data, front_image, back_image):
+                        successful += 1
+                    else:
+                        failed += 1
                 else:
+                    print("  ✗ Skipping - no images found")
                     failed += 1
-            else:
-                print("  ✗ Skipping - no images found")
-                failed += 1
         
         print("\n" + "="*70)
         print("LISTING SUMMARY")
         print("="*70)
-        print(f"Total cards: {len(cards)}")
+        print(f"Total cards: {total_cards}")
         print(f"✓ Successfully listed: {successful}")
         print(f"✗ Failed: {failed}")
         print("="*70)
@@ -1,15 +1,15 @@
 import csv
+from contextlib import nullcontext
 
-def generate_ebay_title(row):
+# Input columns used to build the titles, looked up once from the header row
+INPUT_COLUMNS = ('name', 'nameFR', 'cn', 'condition', 'set', 'quantity')
+OUTPUT_COLUMNS = ['original_name', 'quantity', 'ebay_title']
+
+def generate_ebay_title(french_name, card_number, condition, set_name):
     """
     Generate eBay title in format:
     Carte Pokemon - French Name - Card Number - NM - Set Name - Fr
     """
-    french_name = row['nameFR']
-    card_number = row['cn']
-    condition = row['condition']
-    set_name = row['set']
-    
     # Remove attack names in brackets from French name
     # e.g., "Capumain [Astonish]" becomes "Capumain"
     if '[' in french_name:
@@ -22,31 +22,46 @@ def generate_ebay_title(row):
 
 def process_csv(input_file, output_file=None):
     """
-    Process the CSV file and generate eBay titles
+    Process the CSV file and write each eBay title as it is generated
+    Titles are printed instead when no output file is given
+    Returns the number of titles generated
     """
-    titles = []
+    count = 0
     
     with open(input_file, 'r', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
+        reader = csv.reader(file)
+        header = next(reader, None)
+        
+        # Check the header before the output file is opened (and emptied)
+        if header is not None:
+            missing = [c for c in INPUT_COLUMNS if c not in header]
+            if missing:
+                raise ValueError(f"{input_file} is missing column(s): {', '.join(missing)}")
+            i_name, i_fr, i_cn, i_cond, i_set, i_qty = (header.index(c) for c in INPUT_COLUMNS)
         
-        for row in reader:
-            title = generate_ebay_title(row)
-            titles.append({
-                'original_name': row['name'],
-                'quantity': row['quantity'],
-                'ebay_title': title
-            })
-            print(title)
+        with open(output_file, 'w', encoding='utf-8', newline='') if output_file else nullcontext() as out:
+            writer = csv.writer(out) if out else None
+            
+            if writer:
+                writer.writerow(OUTPUT_COLUMNS)
+            
+            if header is None:
+                return count
+            
+            for row in reader:
+                if not row:
+                    continue
+                title = generate_ebay_title(row[i_fr], row[i_cn], row[i_cond], row[i_set])
+                if writer:
+                    writer.writerow([row[i_name], row[i_qty], title])
+                else:
+                    print(title)
+                count += 1
     
-    # Optionally save to output file
     if output_file:
-        with open(output_file, 'w', encoding='utf-8', newline='') as file:
-            writer = csv.DictWriter(file, fieldnames=['original_name', 'quantity', 'ebay_title'])
-            writer.writeheader()
-            writer.writerows(titles)
         print(f"\nTitles saved to {output_file}")
     
-    return titles
+    return count
 
 # Usage
 if __name__ == "__main__":
@@ -55,6 +70,6 @@ if __name__ == "__main__":
     output_csv = "ebay_titles.csv"   # Optional: output file for titles
     
     # Process the CSV
-    titles = process_csv(input_csv, output_csv)
+    count = process_csv(input_csv, output_csv)
     
-    print(f"\nTotal titles generated: {len(titles)}")
\ No newline at end of file
+    print(f"\nTotal titles generated: {count}")
\ No newline at end of file
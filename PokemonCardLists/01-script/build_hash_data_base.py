@@ -1,29 +1,64 @@
 """
 Build Feature Hash Database
 Run this ONCE to convert all reference images to feature hashes
-This reduces 11GB of images to a few MB JSON file
+This reduces 11GB of images to a few MB compressed NumPy (.npz) file
 """
 
 import cv2
 import numpy as np
 import json
+import os
+import zipfile
+from multiprocessing import Pool
 from pathlib import Path
 from tqdm import tqdm
 
+# Reference images wider than this are downscaled before ORB (same width the matcher compares at)
+FEATURE_WIDTH = 600
+
+def enable_opencl():
+    """Let OpenCV run UMat work on an OpenCL device (iGPU/GPU) when one is available"""
+    cv2.ocl.setUseOpenCL(cv2.ocl.haveOpenCL())
+    return cv2.ocl.useOpenCL()
+
 def extract_features(image_path):
     """Extract ORB features from image"""
-    img = cv2.imread(str(image_path))
-    if img is None:
+    # Decode straight to grayscale: no BGR->gray pass and a third of the decoded pixels
+    gray = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+    if gray is None:
         return None
     
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    # ORB finds the same features at this size, with far fewer pixels to process
+    h, w = gray.shape
+    if w > FEATURE_WIDTH:
+        gray = cv2.resize(gray, (FEATURE_WIDTH, int(h * FEATURE_WIDTH / w)), interpolation=cv2.INTER_AREA)
+    
+    # Feeding a UMat runs the ORB pyramid + descriptor extraction through OpenCL
+    if cv2.ocl.useOpenCL():
+        gray = cv2.UMat(gray)
+    
     orb = cv2.ORB_create(nfeatures=500)
     kp, des = orb.detectAndCompute(gray, None)
     
-    if des is not None:
-        # Convert to list for JSON serialization
-        return des.tolist()
-    return None
+    if isinstance(des, cv2.UMat):
+        des = des.get()
+    
+    # ORB descriptors are packed binary uint8 arrays (32 bytes per keypoint)
+    # stored as-is for cv2.BFMatcher(NORM_HAMMING)
+    if des is None or des.size == 0:
+        return None
+    return des
+
+def _init_worker():
+    """Pool initializer - one OpenCV thread per worker process to avoid oversubscription"""
+    cv2.setNumThreads(1)
+    enable_opencl()
+
+def _extract_one(image_path):
+    """Pool task: return (card_id, features) for one reference image"""
+    # Card ID is the filename part before the first underscore
+    card_id = image_path.stem.split('_')[0]
+    return card_id, extract_features(image_path)
 
 def build_hash_database(set_code, base_path='PokemonCardLists/Card_Sets'):
     """Build feature hash database for a set"""
@@ -61,29 +96,31 @@ def build_hash_database(set_code, base_path='PokemonCardLists/Card_Sets'):
     
     print(f"Found {len(image_files)} images\n")
     
-    # Extract features for each card
+    # Extract features for each card, one worker process per CPU core
     feature_db = {}
     
-    for img_path in tqdm.tqdm(image_files, desc="Extracting features"):
-        # Get card ID from filename
-        filename = img_path.stem
-        parts = filename.split('_')
-        if len(parts) >= 1:
-            card_id = parts[0]
-            
-            # Extract features
-            features = extract_features(img_path)
-            
+    with Pool(processes=os.cpu_count(), initializer=_init_worker) as pool:
+        results = pool.imap_unordered(_extract_one, image_files, chunksize=16)
+        for card_id, features in tqdm(results, total=len(image_files), desc="Extracting features"):
             if features is not None:
                 feature_db[card_id] = features
     
-    # Save to JSON
-    output_file = Path("PokemonCardLists/CardsFeature") / f"card_hashes_{set_code}.json"
+    # Save as compressed NumPy archive (one uint8 array per card ID)
+    # Load with np.load(output_file) - descriptors need no conversion before matching
+    output_file = Path("PokemonCardLists/CardsFeature") / f"card_hashes_{set_code}.npz"
     output_file.parent.mkdir(parents=True, exist_ok=True)
     
     print(f"\nSaving to {output_file}...")
-    with open(output_file, 'w') as f:
-        json.dump(feature_db, f)
+    # Written entry by entry (same layout as np.savez_compressed) so a card ID can
+    # never collide with a savez keyword argument such as 'file'
+    with zipfile.ZipFile(output_file, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for card_id, features in feature_db.items():
+            with archive.open(f"{card_id}.npy", 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, features, allow_pickle=False)
+    
+    # Metadata lives next to the archive, keeping the .npz keys card IDs only
+    metadata_file = output_file.with_suffix('.json')
+    metadata_file.write_text(json.dumps({'feature_width': FEATURE_WIDTH}))
     
     # Calculate size
     file_size = Path(output_file).stat().st_size / (1024 * 1024)
@@ -141,7 +178,7 @@ if __name__ == "__main__":
     
     # Install tqdm if needed
     try:
-        import tqdm
+        from tqdm import tqdm
     except ImportError:
         print("Installing tqdm for progress bars...")
         import subprocess
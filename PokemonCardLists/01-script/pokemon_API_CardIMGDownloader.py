@@ -1,33 +1,84 @@
 import csv
+import io
+import json
+import os
+import random
 import asyncio
 import aiohttp
 from pathlib import Path
+from functools import lru_cache
 import re
+from tqdm import tqdm
 
-# Semaphore to limit concurrent requests
-MAX_CONCURRENT_REQUESTS = 10
+# Semaphore to limit concurrent requests (the CDN handles far more than 10)
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('POKEMON_DL_CONCURRENCY', 32))
 
+# Rate-limited responses are retried with exponential backoff
+RETRY_STATUSES = (429, 503)
+MAX_ATTEMPTS = 4
+
+# Sets downloaded at the same time (they share the semaphore above)
+SETS_PER_BATCH = 8
+
+# Images are streamed to disk in chunks of this size
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Written in IMG/ with the image count once a set has downloaded without failures
+COMPLETE_MARKER = '.complete'
+
+# card_id -> {'etag', 'last_modified'} of the downloaded images, kept in IMG/
+ETAG_FILE = 'etag.json'
+
+# POKEMON_DL_REFRESH=1 re-checks existing images with conditional requests (304 = unchanged)
+REFRESH_EXISTING = os.environ.get('POKEMON_DL_REFRESH') == '1'
+
+# Messages from the concurrent downloads, printed by a single printer task (see download_sets)
+log_queue = None
+
+def log(message):
+    """Queue a message for the printer task, or print it directly when none is running
+    
+    tqdm.write() prints above the progress bars instead of through them
+    """
+    if log_queue is None:
+        tqdm.write(message)
+    else:
+        log_queue.put_nowait(message)
+
+async def printer():
+    """Print queued messages until the None sentinel arrives"""
+    while True:
+        message = await log_queue.get()
+        if message is None:
+            break
+        tqdm.write(message)
+
+# Special cases - sets that have different series than their prefix
+SERIES_SPECIAL_CASES = {
+    'cel25': 'swsh',  # Celebrations is part of Sword & Shield
+    'cel25gg': 'swsh',  # Celebrations: Classic Collection
+    'det1': 'sm',  # Detective Pikachu is part of Sun & Moon
+    'sm7.5': 'sm',  # Dragon Majesty
+    'sm115': 'sm',  # Hidden Fates
+    'sm3.5': 'sm',  # Shining Legends
+    'g1': 'xy',  # Generations is part of XY
+    'dc1': 'xy',  # Double Crisis
+    'dv1': 'bw',  # Dragon Vault
+    'rc': 'bw',  # Radiant Collection
+}
+
+# Alphabetic prefix of a set_id, without the trailing 'p' of promo sets
+SERIES_PATTERN = re.compile(r'^([a-z]+?)p?(?:\d|$)')
+SERIES_FALLBACK_PATTERN = re.compile(r'^([a-z]+)')
+
+@lru_cache(maxsize=None)
 def extract_series_from_set_id(set_id):
     """Extract series code from set_id"""
-    # Special cases - sets that have different series than their prefix
-    special_cases = {
-        'cel25': 'swsh',  # Celebrations is part of Sword & Shield
-        'cel25gg': 'swsh',  # Celebrations: Classic Collection
-        'det1': 'sm',  # Detective Pikachu is part of Sun & Moon
-        'sm7.5': 'sm',  # Dragon Majesty
-        'sm115': 'sm',  # Hidden Fates
-        'sm3.5': 'sm',  # Shining Legends
-        'g1': 'xy',  # Generations is part of XY
-        'dc1': 'xy',  # Double Crisis
-        'dv1': 'bw',  # Dragon Vault
-        'rc': 'bw',  # Radiant Collection
-    }
-    
     set_id_lower = set_id.lower()
     
     # Check special cases first
-    if set_id_lower in special_cases:
-        return special_cases[set_id_lower]
+    if set_id_lower in SERIES_SPECIAL_CASES:
+        return SERIES_SPECIAL_CASES[set_id_lower]
     
     # Common patterns:
     # sv03.5 -> sv
@@ -39,152 +90,290 @@ def extract_series_from_set_id(set_id):
     # base1 -> base (for older sets)
     
     # Extract alphabetic prefix (remove trailing 'p' for promo sets)
-    match = re.match(r'^([a-z]+?)p?(?:\d|$)', set_id_lower)
+    match = SERIES_PATTERN.match(set_id_lower)
     if match:
         return match.group(1)
     
     # Fallback: just extract alphabetic prefix
-    match = re.match(r'^([a-z]+)', set_id_lower)
+    match = SERIES_FALLBACK_PATTERN.match(set_id_lower)
     if match:
         return match.group(1)
     
     return set_id  # fallback to full set_id if no pattern matches
 
-async def download_image(session, url, filepath, semaphore):
-    """Download a single image with rate limiting"""
-    async with semaphore:
+def read_csv_rows(csv_file):
+    """Read a card list CSV into a list of rows (lists of fields), header included"""
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        data = f.read()
+    
+    # Quoted fields may hide commas or newlines, leave those files to the csv module
+    if '"' in data:
+        return list(csv.reader(io.StringIO(data)))
+    
+    return [line.split(',') for line in data.splitlines() if line]
+
+def open_part_file(filepath):
+    """Open the .part file an image is streamed into (runs in the default executor)
+    
+    The data goes to a .part file that is renamed into place once complete, so an
+    interrupted run never leaves a truncated .jpg that would be skipped next time.
+    """
+    return open(filepath + '.part', 'wb')
+
+def close_part_file(f, filepath, complete):
+    """Close a .part file and rename it into place, or delete it if the download failed"""
+    f.close()
+    if complete:
+        os.replace(f.name, filepath)
+    else:
         try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    with open(filepath, 'wb') as f:
-                        f.write(content)
-                    return True
-                else:
-                    print(f"      ✗ Failed (HTTP {response.status}): {url}")
-                    return False
-        except Exception as e:
-            print(f"      ✗ Error: {str(e)}")
-            return False
+            os.unlink(f.name)
+        except FileNotFoundError:
+            pass
+
+async def download_image(session, url, filepath, semaphore, validators=None):
+    """Download a single image with rate limiting, returns (success, error message)
+    
+    validators is the card's ETag/Last-Modified entry: sent as a conditional request
+    when filled in, and updated in place after a download.
+    """
+    headers = {}
+    if validators:
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+    
+    async with semaphore:
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304:
+                        # Unchanged on the CDN, the local file is up to date
+                        return True, None
+                    elif response.status == 200:
+                        # Each chunk is written as it arrives, so at most one chunk per download
+                        # is held in memory; file I/O blocks, so it runs in the default executor
+                        loop = asyncio.get_running_loop()
+                        f = await loop.run_in_executor(None, open_part_file, filepath)
+                        complete = False
+                        try:
+                            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                                await loop.run_in_executor(None, f.write, chunk)
+                            complete = True
+                        finally:
+                            if complete:
+                                await loop.run_in_executor(None, close_part_file, f, filepath, True)
+                            else:
+                                # Failed or cancelled: clean up without awaiting again
+                                close_part_file(f, filepath, False)
+                        
+                        if validators is not None:
+                            validators['etag'] = response.headers.get('ETag')
+                            validators['last_modified'] = response.headers.get('Last-Modified')
+                        return True, None
+                    elif response.status not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                        return False, f"HTTP {response.status}"
+            except Exception as e:
+                return False, str(e)
+            
+            # Rate limited: back off with jitter before retrying
+            await asyncio.sleep(2 ** attempt + random.random())
+
+def load_etags(etag_path):
+    """Read a set's etag.json; a missing, truncated or corrupt file counts as empty"""
+    try:
+        return json.loads(etag_path.read_text())
+    except (OSError, ValueError):
+        return {}
+
+def save_etags(etag_path, etags):
+    """Write a set's etag.json through a temp file so it is never left half-written"""
+    tmp_path = etag_path.with_name(etag_path.name + '.tmp')
+    tmp_path.write_text(json.dumps(etags))
+    os.replace(tmp_path, etag_path)
+
+async def download_card(session, card, semaphore, etags):
+    """Download one (card_id, local_id, filepath, url) entry and return it with (success, error)"""
+    card_id, _, image_filepath, image_url = card
+    validators = etags.setdefault(card_id, {})
+    return card, await download_image(session, image_url, image_filepath, semaphore, validators)
+
+def parse_set_csv(csv_file, img_folder_prefix, existing_files, url_prefix, refresh=False):
+    """List the images a set still needs from its card list CSV
+    
+    Returns (cards_to_download, missing_card_ids): (card_id, local_id, filepath, url)
+    tuples, and the ids of the cards whose image is not on disk yet.
+    """
+    url_suffix = "/high.jpg"
+    
+    # (card_id, local_id, filepath, url) per image to fetch; seen avoids duplicate downloads
+    cards_to_download = []
+    missing_card_ids = []
+    seen_card_ids = set()
+    
+    reader = iter(read_csv_rows(csv_file))
+    
+    # Only two columns are needed, so look them up once instead of building a dict per row
+    header = next(reader, None)
+    if header is None:
+        # Empty CSV: nothing to download
+        return cards_to_download, missing_card_ids
+    id_idx = header.index('id')
+    local_id_idx = header.index('localId')
+    min_length = max(id_idx, local_id_idx) + 1
+    
+    for row in reader:
+        if len(row) < min_length:
+            continue
+        
+        card_id = row[id_idx]
+        local_id = row[local_id_idx]
+        
+        if not card_id:
+            continue
+        
+        # Extract card number from card_id (e.g., "swsh3-136" -> "136")
+        # Card IDs typically follow pattern: {set_id}-{card_number}
+        card_parts = card_id.split('-')
+        if len(card_parts) >= 2:
+            card_number = card_parts[-1]  # Get the last part (card number)
+        else:
+            card_number = card_id  # Fallback to full ID if no dash
+        
+        # Create image filename
+        safe_local_id = local_id.replace('/', '-').replace('\\', '-')
+        image_filename = f"{card_id}_{safe_local_id}.jpg"
+        image_filepath = img_folder_prefix + image_filename
+        
+        # Only add to download list if image doesn't exist (or when refreshing)
+        if image_filename not in existing_files:
+            missing_card_ids.append(card_id)
+        elif not refresh:
+            continue
+        
+        image_url = url_prefix + card_number + url_suffix
+        
+        # Store card info for download
+        if card_id not in seen_card_ids:
+            seen_card_ids.add(card_id)
+            cards_to_download.append((card_id, local_id, image_filepath, image_url))
+    
+    return cards_to_download, missing_card_ids
 
-async def download_set_images(set_folder: Path, semaphore):
+async def download_set_images(set_folder: Path, session, semaphore):
     """Download all card images for a set by reading existing CSVs"""
     
-    print(f"\nProcessing: {set_folder.name}")
+    # Several sets download at once, so every message names its set
+    name = set_folder.name
+    log(f"\nProcessing: {name}")
     
     # Extract set_id from folder name (format: SetName_SetId)
-    folder_parts = set_folder.name.split('_', 1)
+    folder_parts = name.split('_', 1)
     if len(folder_parts) != 2:
-        print(f"  ⚠ Invalid folder name format (expected SetName_SetId)")
+        log(f"  ⚠ {name}: invalid folder name format (expected SetName_SetId)")
         return
     
     set_id = folder_parts[1]
     series = extract_series_from_set_id(set_id)
-    print(f"  Set ID: {set_id}, Series: {series}")
+    log(f"  {name}: set ID {set_id}, series {series}")
     
     # Create IMG folder
     img_folder = set_folder / "IMG"
     img_folder.mkdir(exist_ok=True)
     
+    # One directory read instead of a stat() per card
+    existing_files = {entry.name for entry in os.scandir(img_folder)}
+    jpg_count = sum(1 for name in existing_files if name.endswith('.jpg'))
+    
     # Find all CSV files (any language)
     csv_files = list(set_folder.glob("CardList_*.csv"))
     
     if not csv_files:
-        print(f"  ⚠ No CSV files found in {set_folder.name}")
+        log(f"  ⚠ {name}: no CSV files found")
         return
     
     # Use the first CSV file (they should all have the same cards, just different names)
     csv_file = csv_files[0]
-    print(f"  Reading cards from: {csv_file.name}")
     
-    # Track unique cards (by ID) to avoid duplicate downloads
-    cards_to_download = {}
+    # Set already completed, no image removed and the card list not regenerated
+    # since: skip reading the CSV entirely
+    marker_path = img_folder / COMPLETE_MARKER
+    if (not REFRESH_EXISTING and COMPLETE_MARKER in existing_files
+            and marker_path.read_text().strip() == str(jpg_count)
+            and csv_file.stat().st_mtime <= marker_path.stat().st_mtime):
+        log(f"  ✓ {name}: cached ({jpg_count} images)")
+        return
+    
+    log(f"  {name}: reading cards from {csv_file.name}")
+    
+    # Construct image URLs from TCGdex API
+    # Format: https://assets.tcgdex.net/en/{series}/{set_id}/{card_number}/high.jpg
+    # For most sets, series and set_id are different (e.g., series='swsh', set_id='swsh3')
+    # But for promo sets, they're the same (e.g., series='swshp', set_id='swshp')
+    # So we only include set_id once in the path
+    url_prefix = f"https://assets.tcgdex.net/en/{series}/{set_id}/"
+    
+    # Image paths are plain strings inside the row loop (open() takes them as-is)
+    img_folder_prefix = os.path.join(str(img_folder), '')
+    
+    etag_path = img_folder / ETAG_FILE
+    etags = load_etags(etag_path) if ETAG_FILE in existing_files else {}
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                card_id = row.get('id', '')
-                local_id = row.get('localId', '')
-                
-                if not card_id:
-                    continue
-                
-                # Extract card number from card_id (e.g., "swsh3-136" -> "136")
-                # Card IDs typically follow pattern: {set_id}-{card_number}
-                card_parts = card_id.split('-')
-                if len(card_parts) >= 2:
-                    card_number = card_parts[-1]  # Get the last part (card number)
-                else:
-                    card_number = card_id  # Fallback to full ID if no dash
-                
-                # Create image filename
-                safe_local_id = local_id.replace('/', '-').replace('\\', '-')
-                image_filename = f"{card_id}_{safe_local_id}.jpg"
-                image_filepath = img_folder / image_filename
-                
-                # Only add to download list if image doesn't exist
-                if not image_filepath.exists():
-                    # Construct image URL from TCGdex API
-                    # Format: https://assets.tcgdex.net/en/{series}/{set_id}/{card_number}/high.jpg
-                    # For most sets, series and set_id are different (e.g., series='swsh', set_id='swsh3')
-                    # But for promo sets, they're the same (e.g., series='swshp', set_id='swshp')
-                    # So we only include set_id once in the path
-                    image_url = f"https://assets.tcgdex.net/en/{series}/{set_id}/{card_number}/high.jpg"
-                    
-                    # Store card info for download
-                    if card_id not in cards_to_download:
-                        cards_to_download[card_id] = {
-                            'filepath': image_filepath,
-                            'url': image_url,
-                            'local_id': local_id,
-                            'card_number': card_number
-                        }
+        # The CSV is read in the default executor so other sets keep downloading
+        loop = asyncio.get_running_loop()
+        cards_to_download, missing_card_ids = await loop.run_in_executor(
+            None, parse_set_csv, csv_file, img_folder_prefix, existing_files, url_prefix, REFRESH_EXISTING)
+        
+        # Validators of a missing file must not turn into a 304
+        for card_id in missing_card_ids:
+            etags.pop(card_id, None)
     
     except Exception as e:
-        print(f"  ✗ Error reading CSV: {str(e)}")
+        log(f"  ✗ {name}: error reading CSV: {str(e)}")
         return
     
     if not cards_to_download:
-        print(f"  ✓ All images already downloaded ({len(list(img_folder.glob('*.jpg')))} images)")
+        log(f"  ✓ {name}: all images already downloaded ({jpg_count} images)")
+        marker_path.write_text(str(jpg_count))
         return
     
-    print(f"  Found {len(cards_to_download)} images to download")
+    log(f"  {name}: found {len(cards_to_download)} images to download")
     
-    # Download all images concurrently
-    async with aiohttp.ClientSession() as session:
-        download_tasks = []
-        
-        for card_id, card_info in cards_to_download.items():
-            task = download_image(
-                session, 
-                card_info['url'], 
-                card_info['filepath'], 
-                semaphore
-            )
-            download_tasks.append((task, card_id, card_info['local_id']))
-        
-        # Execute all downloads
-        results = await asyncio.gather(*[task for task, _, _ in download_tasks])
-        
-        # Count successes
-        success_count = sum(1 for r in results if r)
-        print(f"  ✓ Downloaded {success_count}/{len(download_tasks)} images")
-        
-        # Show failed downloads
-        failed_cards = [
-            (card_id, local_id) 
-            for (_, card_id, local_id), success in zip(download_tasks, results) 
-            if not success
-        ]
-        
-        if failed_cards:
-            print(f"  ⚠ Failed to download {len(failed_cards)} images:")
-            for card_id, local_id in failed_cards[:5]:  # Show first 5
-                print(f"    - {card_id} ({local_id})")
-            if len(failed_cards) > 5:
-                print(f"    ... and {len(failed_cards) - 5} more")
+    # Download all images concurrently, handling each result as soon as it finishes
+    success_count = 0
+    failed_cards = []
+    pending = [download_card(session, card, semaphore, etags) for card in cards_to_download]
+    
+    # One progress bar per set (tqdm throttles its own redraws) instead of a line per event
+    try:
+        with tqdm(total=len(cards_to_download), desc=name, unit='img') as progress:
+            for finished in asyncio.as_completed(pending):
+                (card_id, local_id, _, _), (success, error) = await finished
+                if success:
+                    success_count += 1
+                else:
+                    failed_cards.append((card_id, local_id, error))
+                progress.update(1)
+    finally:
+        # Also saved when the run is interrupted, keeping the ETags gathered so far
+        save_etags(etag_path, etags)
+    
+    # Count successes
+    log(f"  ✓ {name}: downloaded {success_count}/{len(cards_to_download)} images")
+    
+    if not failed_cards:
+        jpg_count = sum(1 for entry in os.scandir(img_folder) if entry.name.endswith('.jpg'))
+        marker_path.write_text(str(jpg_count))
+    
+    # Show failed downloads
+    if failed_cards:
+        log(f"  ⚠ {name}: failed to download {len(failed_cards)} images:")
+        for card_id, local_id, error in failed_cards[:5]:  # Show first 5
+            log(f"    - {card_id} ({local_id}): {error}")
+        if len(failed_cards) > 5:
+            log(f"    ... and {len(failed_cards) - 5} more")
 
 def display_sets_menu(set_folders):
     """Display available sets and get user selection"""
@@ -202,7 +391,8 @@ def display_sets_menu(set_folders):
             # Check if IMG folder exists and count images
             img_folder = folder / "IMG"
             if img_folder.exists():
-                img_count = len(list(img_folder.glob('*.jpg'))) + len(list(img_folder.glob('*.png'))) + len(list(img_folder.glob('*.webp')))
+                img_count = sum(1 for entry in os.scandir(img_folder)
+                                if entry.name.endswith(('.jpg', '.png', '.webp')))
                 status = f"✓ {img_count} images" if img_count > 0 else "⚠ empty"
             else:
                 status = "⚠ no IMG folder"
@@ -216,6 +406,9 @@ def display_sets_menu(set_folders):
 
 def get_user_choice(set_folders):
     """Get and validate user input"""
+    # Lowercased names computed once for every search
+    folder_index = [(folder, folder.name.lower()) for folder in set_folders]
+    
     while True:
         try:
             print("\nOptions:")
@@ -244,13 +437,9 @@ def get_user_choice(set_folders):
             except ValueError:
                 # Not a number, try searching by name/code
                 search_term = choice.lower()
-                matches = []
                 
-                for folder in set_folders:
-                    folder_lower = folder.name.lower()
-                    # Check if search term is in folder name
-                    if search_term in folder_lower:
-                        matches.append(folder)
+                # Check if search term is in folder name
+                matches = [folder for folder, folder_lower in folder_index if search_term in folder_lower]
                 
                 if len(matches) == 0:
                     print(f"❌ No sets found matching '{choice}'")
@@ -291,6 +480,40 @@ def get_user_choice(set_folders):
             print("\n\nOperation cancelled by user.")
             return None
 
+async def download_sets(set_folders):
+    """Download the images of all given set folders (shared by both downloader scripts)"""
+    
+    # Create semaphore to limit concurrent requests
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    
+    # One session for every set so keep-alive connections to the CDN are reused
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENT_REQUESTS * 2,
+        limit_per_host=MAX_CONCURRENT_REQUESTS,
+        ttl_dns_cache=300,
+        keepalive_timeout=60
+    )
+    
+    global log_queue
+    log_queue = asyncio.Queue()
+    printer_task = asyncio.create_task(printer())
+    
+    try:
+        # Response buffer sized like the chunks download_image reads
+        async with aiohttp.ClientSession(connector=connector,
+                                         timeout=aiohttp.ClientTimeout(total=30),
+                                         read_bufsize=DOWNLOAD_CHUNK_SIZE) as session:
+            # Process the sets concurrently, a batch at a time
+            for start in range(0, len(set_folders), SETS_PER_BATCH):
+                batch = set_folders[start:start + SETS_PER_BATCH]
+                log(f"\n[{start + 1}-{start + len(batch)}/{len(set_folders)}]")
+                await asyncio.gather(*(download_set_images(set_folder, session, semaphore)
+                                       for set_folder in batch))
+    finally:
+        log_queue.put_nowait(None)
+        await printer_task
+        log_queue = None
+
 async def main():
     """Main function to download images for selected sets"""
     
@@ -326,13 +549,7 @@ async def main():
     print(f"DOWNLOADING {len(selected_sets)} SET(S)")
     print(f"{'='*70}")
     
-    # Create semaphore to limit concurrent requests
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-    
-    # Process each selected set folder
-    for idx, set_folder in enumerate(selected_sets, 1):
-        print(f"\n[{idx}/{len(selected_sets)}] {set_folder.name}")
-        await download_set_images(set_folder, semaphore)
+    await download_sets(selected_sets)
     
     print("\n" + "="*70)
     print("✓ DOWNLOAD COMPLETED!")
@@ -1,125 +1,8 @@
-import csv
 import asyncio
-import aiohttp
 from pathlib import Path
 
-# Semaphore to limit concurrent requests
-MAX_CONCURRENT_REQUESTS = 10
-
-async def download_image(session, url, filepath, semaphore):
-    """Download a single image with rate limiting"""
-    async with semaphore:
-        try:
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                if response.status == 200:
-                    content = await response.read()
-                    with open(filepath, 'wb') as f:
-                        f.write(content)
-                    return True
-                else:
-                    print(f"      ✗ Failed to download (HTTP {response.status})")
-                    return False
-        except Exception as e:
-            print(f"      ✗ Error downloading image: {str(e)}")
-            return False
-
-async def download_set_images(set_folder: Path, semaphore):
-    """Download all card images for a set by reading existing CSVs"""
-    
-    print(f"\nProcessing: {set_folder.name}")
-    
-    # Create IMG folder
-    img_folder = set_folder / "IMG"
-    img_folder.mkdir(exist_ok=True)
-    
-    # Find all CSV files (any language)
-    csv_files = list(set_folder.glob("CardList_*.csv"))
-    
-    if not csv_files:
-        print(f"  ⚠ No CSV files found in {set_folder.name}")
-        return
-    
-    # Use the first CSV file (they should all have the same cards, just different names)
-    csv_file = csv_files[0]
-    print(f"  Reading cards from: {csv_file.name}")
-    
-    # Track unique cards (by ID) to avoid duplicate downloads
-    cards_to_download = {}
-    
-    try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            
-            for row in reader:
-                card_id = row.get('id', '')
-                local_id = row.get('localId', '')
-                
-                if not card_id:
-                    continue
-                
-                # Create image filename
-                safe_local_id = local_id.replace('/', '-').replace('\\', '-')
-                image_filename = f"{card_id}_{safe_local_id}.jpg"
-                image_filepath = img_folder / image_filename
-                
-                # Only add to download list if image doesn't exist
-                if not image_filepath.exists():
-                    # Construct image URL from TCGdex API
-                    # Format: https://assets.tcgdex.net/[language]/[series]/[set]/[cardId]
-                    # We'll use the high resolution image
-                    image_url = f"https://assets.tcgdex.net/en/swsh/base1/{card_id}/high.webp"
-                    
-                    # Store card info for download
-                    if card_id not in cards_to_download:
-                        cards_to_download[card_id] = {
-                            'filepath': image_filepath,
-                            'url': image_url,
-                            'local_id': local_id
-                        }
-    
-    except Exception as e:
-        print(f"  ✗ Error reading CSV: {str(e)}")
-        return
-    
-    if not cards_to_download:
-        print(f"  ⊙ All images already downloaded ({len(list(img_folder.glob('*.jpg')))} images)")
-        return
-    
-    print(f"  Found {len(cards_to_download)} images to download")
-    
-    # Download all images concurrently
-    async with aiohttp.ClientSession() as session:
-        download_tasks = []
-        
-        for card_id, card_info in cards_to_download.items():
-            task = download_image(
-                session, 
-                card_info['url'], 
-                card_info['filepath'], 
-                semaphore
-            )
-            download_tasks.append((task, card_id, card_info['local_id']))
-        
-        # Execute all downloads
-        results = await asyncio.gather(*[task for task, _, _ in download_tasks])
-        
-        # Count successes
-        success_count = sum(1 for r in results if r)
-        print(f"  ✓ Downloaded {success_count}/{len(download_tasks)} images")
-        
-        # Show failed downloads
-        failed_cards = [
-            (card_id, local_id) 
-            for (_, card_id, local_id), success in zip(download_tasks, results) 
-            if not success
-        ]
-        
-        if failed_cards:
-            print(f"  ⚠ Failed to download {len(failed_cards)} images:")
-            for card_id, local_id in failed_cards[:5]:  # Show first 5
-                print(f"    - {card_id} ({local_id})")
-            if len(failed_cards) > 5:
-                print(f"    ... and {len(failed_cards) - 5} more")
+# Download helpers are shared with the interactive image downloader
+from pokemon_API_CardIMGDownloader import download_sets
 
 async def main():
     """Main function to download images for all sets"""
@@ -167,12 +50,7 @@ async def main():
     print(f"Processing {len(set_folders)} set folders")
     print(f"{'='*70}\n")
     
-    # Create semaphore to limit concurrent requests
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
-    
-    # Process each set folder
-    for idx, set_folder in enumerate(set_folders, 1):
-        await download_set_images(set_folder, semaphore)
+    await download_sets(set_folders)
     
     print("\n" + "="*70)
     print("✓ DOWNLOAD COMPLETED!")
@@ -3,20 +3,45 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import csv
 import json
 import time
 import os
 import re
+import fnmatch
+import importlib.util
+import tempfile
 from pathlib import Path
 import unicodedata
-from datetime import datetime
+from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter, defaultdict
+from functools import lru_cache
 import threading
 import queue
 from urllib.parse import quote
 import random
 
+# orjson (optional) decodes the growing results file much faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# selectolax (optional) pulls the price rows out of product pages much faster
+# than building a BeautifulSoup tree
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# lxml (optional) builds BeautifulSoup trees much faster than html.parser
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
 # Language mapping
 LANGUAGE_MAP = {
     'EN': 1,
@@ -26,13 +51,133 @@ LANGUAGE_MAP = {
 
 # Thread-safe lock for saving results
 save_lock = threading.Lock()
+# While scraping, each finished card is appended to <output>.partial.ndjson; the
+# JSON file is only rewritten at the end (and rebuilt from it after a crash)
+CHECKPOINT_SUFFIX = '.partial.ndjson'
+checkpoint_lock = threading.Lock()
 # Thread-safe lock for driver initialization
 driver_init_lock = threading.Lock()
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 STRATEGY_FILE = os.path.join(SCRIPT_DIR, "set_strategy_cache.json")
 strategy_lock = threading.Lock()
+# Card_Sets folder holding the CardList_*_en CSV files (English card names)
+ENGLISH_CARD_SETS_DIR = r"D:\02-Travaille\04-Coding\03-Projects\05-Rename_Pokemon_Photo\PokemonCardLists\Card_Sets"
 ALLSETS_FILE = os.path.join(os.path.dirname(SCRIPT_DIR), "PokemonCardLists", "all_sets_full.json")
+SINGLES_URL = "https://www.cardmarket.com/fr/Pokemon/Products/Singles"
+
+# Precompiled patterns used for every card
+NON_NAME_CHARS = re.compile(r'[^\w\s-]')
+REPEATED_HYPHENS = re.compile(r'-+')
+LANGUAGE_PARAM = re.compile(r'\?language=\d+')
+# CardName_Number_... card filenames; the number stops at the next '_' or the extension
+CARD_FILENAME = re.compile(r'([^_]*)_([^_]*?)(?=_|(?:\.[^._]*)?$)')
+CARD_IMAGE_SUFFIXES = frozenset({'.jpg', '.jpeg', '.png'})
+
+def strip_accents(text):
+    """Remove combining marks after NFD decomposition (é -> e)"""
+    nfd = unicodedata.normalize('NFD', text)
+    return ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
+
+def build_accent_table():
+    """Map accented Latin letters to what strip_accents gives them, for str.translate"""
+    table = {}
+    for code in range(0xC0, 0x250):
+        stripped = strip_accents(chr(code))
+        if stripped != chr(code) and stripped.isascii():
+            table[code] = stripped
+    return table
+
+# Lets the usual names be de-accented by one translate pass
+ACCENT_TABLE = build_accent_table()
+
+# Each thread spaces its page loads by a random interval (seconds); a rate-limit
+# page pauses every thread for RATE_LIMIT_BACKOFF seconds
+REQUEST_INTERVAL = (5, 12)
+RATE_LIMIT_BACKOFF = 60
+request_pacing = threading.local()
+rate_limit_lock = threading.Lock()
+rate_limited_until = 0.0
+
+# Product pages are fetched over a keep-alive HTTP session (one per thread) that
+# reuses the browser's cookies; Chrome is only used when Cloudflare challenges
+HTTP_TIMEOUT = 30
+HTTP_OK_STATUSES = (200, 404)
+CHALLENGE_MARKERS = ('cf-chl', 'Just a moment')
+CHALLENGE_MARKERS_BYTES = tuple(marker.encode() for marker in CHALLENGE_MARKERS)
+HTTP_FAILURE_LIMIT = 3
+# Dropped connections and read timeouts are retried on the HTTP session rather
+# than sending the card to Chrome; error statuses are not (403/503 are Cloudflare)
+HTTP_RETRIES = Retry(total=2, connect=2, read=2, status=0, backoff_factor=0.5,
+                     respect_retry_after_header=False)
+http_state = threading.local()
+
+# Chrome's throwaway profile loses its HTTP cache on every run; a fixed cache
+# folder per worker thread keeps the site's scripts and styles between runs
+CHROME_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'cardmarket-chrome-cache')
+
+# Prices are read from the page text only, so Chrome never needs to download
+# card pictures or web fonts. Stylesheets stay on: the search form and the
+# expansion dropdown must be laid out for the clicks to land
+CHROME_CONTENT_PREFS = {'profile.managed_default_content_settings.images': 2}
+CHROME_BLOCKED_URLS = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.svg',
+                       '*.woff', '*.woff2', '*.ttf', '*.otf']
+
+# Each new browser opens this page once so Cloudflare's clearance cookie is in
+# place before the first product page (and is shared with the HTTP session)
+WARM_UP_URL = "https://www.cardmarket.com/fr/Pokemon"
+CHALLENGE_TIMEOUT = 30
+
+# Only the product title and the <dl> price rows are needed from a product page
+PRICE_ROW_CLASS = 'labeled row mx-auto g-0'
+PRODUCT_PAGE_STRAINER = SoupStrainer(['h1', 'dl'])
+# Search result pages are only scanned for their links
+SEARCH_LINKS_STRAINER = SoupStrainer('a', href=True)
+# Same extraction as parse_product_page, run inside Chrome so only the prices
+# come back instead of the serialized page (text pieces are trimmed and joined
+# like get_text(strip=True))
+PRODUCT_PAGE_SCRIPT = """
+const text = el => {
+    const walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT);
+    let out = '', node;
+    while ((node = walker.nextNode())) out += node.nodeValue.trim();
+    return out;
+};
+const prices = {};
+for (const row of document.querySelectorAll('[class="' + arguments[0] + '"]')) {
+    const dts = row.querySelectorAll('dt');
+    const dds = row.querySelectorAll('dd');
+    for (let i = 0; i < Math.min(dts.length, dds.length); i++) {
+        prices[text(dts[i])] = text(dds[i]);
+    }
+}
+const h1 = document.querySelector('h1');
+return [prices, h1 ? text(h1) : null];
+"""
+
+# Results scraped today are reused instead of scraped again; setting
+# CARDMARKET_RESULTS_TTL_HOURS reuses anything scraped less than that many hours ago
+RESULTS_TTL_HOURS = (float(os.environ['CARDMARKET_RESULTS_TTL_HOURS'])
+                     if os.environ.get('CARDMARKET_RESULTS_TTL_HOURS') else None)
+RESULTS_REUSED = (f"scraped in the last {RESULTS_TTL_HOURS:g}h" if RESULTS_TTL_HOURS is not None
+                  else "already scraped today")
+
+# Worker threads (one Chrome + HTTP session each) scraping at the same time
+WORKER_THREADS = int(os.environ.get('CARDMARKET_THREADS', 1))
+
+def wait_for_request_slot():
+    """Sleep only for what is left of this thread's request interval (or a rate-limit pause)"""
+    now = time.monotonic()
+    ready_at = max(getattr(request_pacing, 'next_request', now), rate_limited_until)
+    if ready_at > now:
+        time.sleep(ready_at - now)
+    request_pacing.next_request = time.monotonic() + random.uniform(*REQUEST_INTERVAL)
+
+def report_rate_limited():
+    """Hold back every thread's next page load for RATE_LIMIT_BACKOFF seconds"""
+    global rate_limited_until
+    with rate_limit_lock:
+        rate_limited_until = max(rate_limited_until, time.monotonic() + RATE_LIMIT_BACKOFF)
 
 def load_ptcgo_codes():
     """Load ptcgoCode mapping from all_set_full.json"""
@@ -58,6 +203,7 @@ def load_ptcgo_codes():
 
 ptcgo_codes = load_ptcgo_codes()
 
+@lru_cache(maxsize=None)
 def get_ptcgo_code_for_set(folder_name):
     """Get ptcgoCode for a set based on folder name"""
     # Extract parts from folder name
@@ -70,8 +216,9 @@ def get_ptcgo_code_for_set(folder_name):
             return ptcgo_codes[part]
     
     # Try matching the full folder name against set IDs
+    folder_clean = folder_lower.replace('-', '').replace('_', '')
     for set_id, code in ptcgo_codes.items():
-        if set_id in folder_lower or folder_lower.replace('-', '').replace('_', '') in set_id.replace('-', ''):
+        if set_id in folder_lower or folder_clean in set_id.replace('-', ''):
             return code
     
     # Try matching set name (e.g., "sandstorm" from "EX-Sandstorm_EX2")
@@ -85,12 +232,11 @@ def get_ptcgo_code_for_set(folder_name):
 
 def execute_saved_url_strategy(driver, card_info, existing_results, thread_id):
     """Execute saved URL strategy - reuse URL from existing results"""
-    key = f"{card_info['set_folder']}_{card_info['filename']}"
+    saved_result = existing_results.get((card_info['set_folder'], card_info['filename']))
     
-    if key not in existing_results:
+    if saved_result is None:
         return None
     
-    saved_result = existing_results[key]
     saved_url = saved_result.get('url')
     
     if not saved_url:
@@ -194,20 +340,15 @@ def load_strategy_cache():
 strategy_cache = load_strategy_cache()
 
 def save_strategy_cache(set_folder, strategy):
+    """Upsert a successful strategy into the shared cache, writing the file only when it changes"""
     with strategy_lock:
-        data = load_strategy_cache()
-        current = data.get(set_folder, [])
-        
-        # Ensure it's a list (for backward compatibility)
-        if isinstance(current, str):
-            current = [current]
+        current = strategy_cache.setdefault(set_folder, [])
         
         # Add new strategy if not already present
         if strategy not in current:
             current.append(strategy)
-            data[set_folder] = current
             with open(STRATEGY_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+                json.dump(strategy_cache, f, indent=2)
 
 def extract_30d_price(prices: dict):
     """Extract 'Prix moyen 30 jours' as float"""
@@ -224,35 +365,36 @@ def build_card_uid(card_info):
     """Stable unique identifier for a card"""
     return f"{card_info['set_folder']}|{card_info['language']}|{card_info['card_number']}"
 
+@lru_cache(maxsize=4096)
 def sanitize_card_name(card_name):
     """
     Sanitize card name by removing special characters and accents
     Spaces are replaced with hyphens
     """
-    nfd = unicodedata.normalize('NFD', card_name)
-    card_name = ''.join(char for char in nfd if unicodedata.category(char) != 'Mn')
-    card_name = re.sub(r'[^\w\s-]', '', card_name)
+    translated = card_name.translate(ACCENT_TABLE)
+    # Anything the table does not cover goes through the full decomposition
+    card_name = translated if translated.isascii() else strip_accents(card_name)
+    card_name = NON_NAME_CHARS.sub('', card_name)
     card_name = card_name.replace(' ', '-')
-    card_name = re.sub(r'-+', '-', card_name)
+    card_name = REPEATED_HYPHENS.sub('-', card_name)
     card_name = card_name.strip('-')
     return card_name
 
 def parse_card_filename(filename):
     """Parse card filename to extract card name and number"""
-    name_without_ext = os.path.splitext(filename)[0]
-    parts = name_without_ext.split('_')
-    if len(parts) >= 2:
-        card_name = parts[0]
-        card_number = parts[1]
-        return card_name, card_number
+    match = CARD_FILENAME.match(filename)
+    if match:
+        return match.groups()
     return None, None
 
+@lru_cache(maxsize=None)
 def get_set_abbreviation(set_name):
     """Extract set abbreviation from set name"""
     words = set_name.replace('_', '-').split('-')
     abbreviation = ''.join(word[0].upper() for word in words if word)
     return abbreviation
 
+@lru_cache(maxsize=None)
 def get_extended_abbreviation(set_name, current_abbr):
     """Get extended abbreviation: first letter + first 2 letters of second word"""
     words = set_name.replace('_', '-').split('-')
@@ -261,6 +403,7 @@ def get_extended_abbreviation(set_name, current_abbr):
         return words[0][0].upper() + words[1][:2].upper()
     return current_abbr
 
+@lru_cache(maxsize=None)
 def get_set_name(folder_name):
     """Extract set name from folder name"""
     parts = folder_name.rsplit('_', 1)
@@ -268,6 +411,7 @@ def get_set_name(folder_name):
         return parts[0].replace('_', '-')
     return folder_name
 
+@lru_cache(maxsize=None)
 def get_set_id_from_folder(folder_name):
     """Extract set ID from folder name (e.g., 'PAR' from 'Paradox-Rift_PAR')"""
     parts = folder_name.rsplit('_', 1)
@@ -275,24 +419,32 @@ def get_set_id_from_folder(folder_name):
         return parts[1].upper()
     return None
 
+@lru_cache(maxsize=4096)
 def build_cardmarket_url(set_name, card_name, set_abbr, card_number, language_code, variant=None):
     """Build Cardmarket URL from components"""
-    base_url = "https://www.cardmarket.com/fr/Pokemon/Products/Singles"
-    
-    if variant:
-        card_slug = f"{card_name}-{variant}-{set_abbr}{card_number}"
-    else:
-        card_slug = f"{card_name}-{set_abbr}{card_number}"
-    url = f"{base_url}/{set_name}/{card_slug}?language={language_code}"
-    return url
+    variant_part = f"{variant}-" if variant else ""
+    return f"{SINGLES_URL}/{set_name}/{card_name}-{variant_part}{set_abbr}{card_number}?language={language_code}"
 
 def build_search_url(set_name, card_number):
     """Build CardMarket search URL for a specific card within a set"""
-    base_url = "https://www.cardmarket.com/fr/Pokemon/Products/Singles"
     # Search for the card number within the set
-    search_url = f"{base_url}/{set_name}?searchString={card_number}&idRarity=0&perSite=30"
+    search_url = f"{SINGLES_URL}/{set_name}?searchString={card_number}&idRarity=0&perSite=30"
     return search_url
 
+def wait_for_navigation(driver, element, timeout=10):
+    """Wait until the page holding element has been replaced and the new one has loaded
+    
+    Returns as soon as that happens instead of sleeping a fixed time; gives up
+    quietly after timeout (for example when the page did not navigate).
+    """
+    try:
+        WebDriverWait(driver, timeout).until(EC.staleness_of(element))
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except:
+        pass
+
 def search_card_in_set(driver, set_name, card_number, card_name, thread_id, language_code):
     """
     Search for a card within a set using CardMarket's search input
@@ -304,8 +456,8 @@ def search_card_in_set(driver, set_name, card_number, card_name, thread_id, lang
     
     try:
         print(f"    [{thread_id}] 🔍 Opening search page: {search_url}")
+        wait_for_request_slot()
         driver.get(search_url)
-        time.sleep(random.uniform(5, 12))
         
         # Find the search input field
         try:
@@ -320,37 +472,33 @@ def search_card_in_set(driver, set_name, card_number, card_name, thread_id, lang
             print(f"    [{thread_id}] 🔍 Searching for: {card_name.replace('-', ' ')}")
             
             # Submit the search (press Enter)
-            from selenium.webdriver.common.keys import Keys
             search_input.send_keys(Keys.RETURN)
             
             # Wait for results to load
-            time.sleep(3)
+            wait_for_navigation(driver, search_input)
             
         except Exception as e:
             print(f"    [{thread_id}] ⚠️ Could not find or use search input: {e}")
             return None
         
-        # Parse the results page
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        # Parse the results page (links only)
+        soup = BeautifulSoup(driver.page_source, HTML_PARSER, parse_only=SEARCH_LINKS_STRAINER)
         
         # Look for product links
         product_links = soup.find_all('a', href=True)
         
+        # Check if a link contains our card number pattern
+        # Looking for patterns like "DP 17", "DP17", "(DP 17)", etc.
+        card_num_clean = card_number.upper().strip()
+        text_patterns = (f"({card_num_clean})", card_num_clean.replace('-', ' '), card_num_clean.replace('-', ''))
+        
         for link in product_links:
             href = link['href']
             link_text = link.get_text(strip=True)
-            
-            # Check if this link contains our card number pattern
-            # Looking for patterns like "DP 17", "DP17", "(DP 17)", etc.
-            card_num_clean = card_number.upper().strip()
+            link_text_upper = link_text.upper()
             
             # Try to match the card number in various formats
-            if any([
-                f"{card_num_clean}" in href.upper(),
-                f"({card_num_clean})" in link_text.upper(),
-                f"{card_num_clean.replace('-', ' ')}" in link_text.upper(),
-                f"{card_num_clean.replace('-', '')}" in link_text.upper()
-            ]):
+            if card_num_clean in href.upper() or any(pattern in link_text_upper for pattern in text_patterns):
                 # Verify it's a singles product page
                 if '/Singles/' in href and set_name in href:
                     # Build full URL
@@ -374,62 +522,87 @@ def search_card_in_set(driver, set_name, card_number, card_name, thread_id, lang
         print(f"    [{thread_id}] ❌ Error during search: {e}")
         return None
     
+@lru_cache(maxsize=None)
+def list_folder_names(folder):
+    """Names in a CardList folder, listed once per run (hidden entries skipped like glob does)"""
+    try:
+        with os.scandir(folder) as entries:
+            return tuple(entry.name for entry in entries if not entry.name.startswith('.'))
+    except OSError:
+        return ()
+
+@lru_cache(maxsize=None)
+def read_english_csv(csv_file):
+    """Parse an English CardList CSV into {localId: name} (cached, the dict is shared)"""
+    card_names = {}
+    with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if 'localId' not in header or 'name' not in header:
+            return card_names
+        id_col = header.index('localId')
+        name_col = header.index('name')
+        last_col = max(id_col, name_col)
+        
+        for row in reader:
+            if len(row) <= last_col:
+                continue
+            local_id = row[id_col].strip()
+            name = row[name_col].strip()
+            if local_id and name:
+                card_names[local_id] = name
+    return card_names
+
 def load_english_card_names(set_folder_path):
     """Load English card names from CSV file"""
-    csv_folder = Path(r"D:\02-Travaille\04-Coding\03-Projects\05-Rename_Pokemon_Photo\PokemonCardLists\Card_Sets")
-    folder_name = set_folder_path.name
+    return english_names_for_folder(set_folder_path.name)
+
+@lru_cache(maxsize=None)
+def english_names_for_folder(folder_name):
+    """English names for a set folder name, looked up once per name"""
     parts = folder_name.split('_')
     if len(parts) >= 2:
         set_code = parts[-1].lower()
     else:
         return {}
     
-    set_folders = list(csv_folder.glob(f"*{set_code}*"))
-    if not set_folders:
+    set_folder_names = list_folder_names(ENGLISH_CARD_SETS_DIR)
+    matches = fnmatch.filter(set_folder_names, f"*{set_code}*")
+    if not matches:
         set_code_base = ''.join(c for c in set_code if not c.isdigit())
-        set_folders = list(csv_folder.glob(f"*{set_code_base}*"))
+        matches = fnmatch.filter(set_folder_names, f"*{set_code_base}*")
     
-    if not set_folders:
+    if not matches:
         return {}
     
-    csv_set_folder = set_folders[0]
-    csv_files = list(csv_set_folder.glob("CardList_*_en.CSV")) or list(csv_set_folder.glob("CardList_*_en.csv"))
+    csv_set_folder = os.path.join(ENGLISH_CARD_SETS_DIR, matches[0])
+    # One listing, matched with glob's rules for both spellings of the extension
+    csv_names = list_folder_names(csv_set_folder)
+    csv_files = fnmatch.filter(csv_names, "CardList_*_en.CSV") or fnmatch.filter(csv_names, "CardList_*_en.csv")
     
     if not csv_files:
         return {}
     
-    csv_file = csv_files[0]
-    card_names = {}
     try:
-        import csv
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                local_id = row.get('localId', '').strip()
-                name = row.get('name', '').strip()
-                if local_id and name:
-                    card_names[local_id] = name
-        return card_names
+        return read_english_csv(os.path.join(csv_set_folder, csv_files[0]))
     except Exception as e:
         return {}
 
 def save_results(all_results, output_file):
     """Save results to JSON file (thread-safe)"""
-
     with save_lock:
         try:
             # Load existing collection history
             collection_history = []
             if os.path.exists(output_file):
                 try:
-                    with open(output_file, 'r', encoding='utf-8') as f:
-                        old_data = json.load(f)
-                        if isinstance(old_data, dict):
-                            collection_history = old_data.get('collection_history', [])
+                    old_data = read_results_file(output_file)
+                    if isinstance(old_data, dict):
+                        collection_history = old_data.get('collection_history', [])
                 except:
                     pass
             
-            set_strategies = {}
+            set_strategies = defaultdict(Counter)
             total_value = 0.0
             seen_cards = set()
 
@@ -443,8 +616,6 @@ def save_results(all_results, output_file):
 
                 # ---- strategy stats ----
                 if set_name:
-                    set_strategies.setdefault(set_name, {})
-                    set_strategies[set_name].setdefault(strategy, 0)
                     set_strategies[set_name][strategy] += 1
 
                 # ---- collection total value (unique cards only) ----
@@ -473,8 +644,9 @@ def save_results(all_results, output_file):
                 'results': all_results
             }
 
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, indent=2, ensure_ascii=False)
+            # Serialize first so the file gets one large write instead of one per token
+            with open(output_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
+                f.write(json.dumps(output_data, indent=2, ensure_ascii=False))
 
             return True
 
@@ -482,14 +654,85 @@ def save_results(all_results, output_file):
             print(f"    ⚠️ Error saving results: {e}")
             return False
         
+def read_results_file(output_file):
+    """Decode the results JSON file, with orjson when it is installed"""
+    if orjson:
+        with open(output_file, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(output_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def results_cutoff():
+    """Oldest scrape_timestamp still reused (timestamps are zero-padded, so they compare as strings)"""
+    if RESULTS_TTL_HOURS is None:
+        # Start of today: every result scraped today is reused
+        return datetime.now().strftime('%Y-%m-%d 00:00:00')
+    return (datetime.now() - timedelta(hours=RESULTS_TTL_HOURS)).strftime('%Y-%m-%d %H:%M:%S')
+
+def index_loaded_result(item, cutoff, results, price_history):
+    """File a saved result: keep its price history, and reuse it if scraped after cutoff
+    
+    Returns True when the result was added to results.
+    """
+    if not item.get('success'):
+        return False
+    
+    card_info = item.get('card_info', {})
+    if 'price_history' in item:
+        price_history[build_card_uid(card_info)] = item['price_history']
+    
+    if item.get('scrape_timestamp', '') >= cutoff:
+        # (set_folder, filename) tuples hash without building a joined string
+        results[(card_info.get('set_folder'), card_info.get('filename'))] = item
+        return True
+    return False
+
+def write_checkpoint(checkpoint, result):
+    """Append one finished card to the NDJSON checkpoint (thread-safe)"""
+    line = json.dumps(result, ensure_ascii=False) + '\n'
+    with checkpoint_lock:
+        checkpoint.write(line)
+
+def recover_checkpoint(checkpoint_file, existing_results, price_history):
+    """Merge the cards an interrupted run had already scraped back into the loaded results
+    
+    Returns every recovered result keyed by (set_folder, filename), so the final save
+    can keep the ones that are not part of this scan.
+    """
+    if not os.path.exists(checkpoint_file):
+        return {}
+    
+    cutoff = results_cutoff()
+    recovered = {}
+    lines = []
+    with open(checkpoint_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                # The last line may have been cut short by the crash
+                continue
+            lines.append(line.rstrip('\n') + '\n')
+            index_loaded_result(item, cutoff, existing_results, price_history)
+            card_info = item.get('card_info', {})
+            recovered[(card_info.get('set_folder'), card_info.get('filename'))] = item
+    
+    # Rewrite the checkpoint with the valid lines only, so a cut-off last line is not
+    # glued to the first card this run appends
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.writelines(lines)
+    os.replace(tmp_file, checkpoint_file)
+    
+    return recovered
+
 def load_existing_results(output_file):
     """Load existing results from JSON file and extract set strategies"""
     if not os.path.exists(output_file):
         return {}, {}, {}
     
     try:
-        with open(output_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = read_results_file(output_file)
         
         # Handle both old and new format
         if isinstance(data, list):
@@ -500,30 +743,12 @@ def load_existing_results(output_file):
             set_strategies = data.get('set_strategies', {})
         
         results_dict = {}
-        today = datetime.now().strftime('%Y-%m-%d')
-        
-        for item in results_list:
-            if not item.get('success'):
-                continue
-            
-            card_info = item.get('card_info', {})
-            timestamp = item.get('scrape_timestamp', '')
-            
-            if timestamp.startswith(today):
-                key = f"{card_info.get('set_folder')}_{card_info.get('filename')}"
-                results_dict[key] = item
-        
         price_history = {}
-
+        cutoff = results_cutoff()
+        
+        # One pass collects both the fresh results and every card's price history
         for item in results_list:
-            if not item.get('success'):
-                continue
-                
-            card_info = item.get('card_info', {})
-            uid = build_card_uid(card_info)
-
-            if 'price_history' in item:
-                price_history[uid] = item['price_history']
+            index_loaded_result(item, cutoff, results_dict, price_history)
 
         return results_dict, set_strategies, price_history
 
@@ -544,11 +769,6 @@ def get_best_strategy_for_set(set_folder, set_strategies):
     best_strategy = max(strategies.items(), key=lambda x: x[1])
     return best_strategy[0]
 
-def is_card_scraped_today(card_info, existing_results):
-    """Check if a card has already been scraped today"""
-    key = f"{card_info['set_folder']}_{card_info['filename']}"
-    return key in existing_results
-
 def initialize_driver():
     """Initialize a Chrome driver with thread-safe locking"""
     with driver_init_lock:
@@ -558,47 +778,177 @@ def initialize_driver():
         options.add_argument('--no-sandbox')
         options.add_argument('--disable-dev-shm-usage')
         options.add_argument('--lang=fr-FR')
+        options.add_argument(f'--disk-cache-dir={os.path.join(CHROME_CACHE_DIR, threading.current_thread().name)}')
+        options.add_experimental_option('prefs', CHROME_CONTENT_PREFS)
         
         try:
             driver = uc.Chrome(options=options, version_main=None)
-            return driver
         except Exception as e:
             print(f"Error initializing driver: {e}")
             time.sleep(2)
             driver = uc.Chrome(options=options, version_main=None)
-            return driver
+        block_heavy_resources(driver)
+        return driver
+
+def block_heavy_resources(driver):
+    """Stop the browser from downloading images and fonts (not needed for prices)"""
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': CHROME_BLOCKED_URLS})
+    except Exception as e:
+        # The image pref above still applies; only fonts keep downloading
+        print(f"Could not block images/fonts: {e}")
+
+def warm_up_browser(driver, thread_id):
+    """Load the Cardmarket home page once and wait for the Cloudflare check to clear"""
+    try:
+        wait_for_request_slot()
+        driver.get(WARM_UP_URL)
+        WebDriverWait(driver, CHALLENGE_TIMEOUT).until(
+            lambda d: not any(marker in d.title for marker in CHALLENGE_MARKERS)
+        )
+        print(f"[Thread-{thread_id}] Cloudflare check passed")
+    except Exception as e:
+        print(f"[Thread-{thread_id}] ⚠️ Warm-up page did not clear: {e}")
+
+def get_http_session(driver):
+    """Thread-local keep-alive session sending the browser's user agent and cookies"""
+    session = getattr(http_state, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=HTTP_RETRIES))
+        session.headers.update({
+            'User-Agent': driver.execute_script("return navigator.userAgent"),
+            'Accept-Language': 'fr-FR,fr;q=0.9',
+        })
+        sync_browser_cookies(driver, session)
+        http_state.session = session
+        http_state.failures = 0
+    return session
+
+def sync_browser_cookies(driver, session):
+    """Copy the browser's cookies (including the Cloudflare clearance) into the HTTP session"""
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie['name'], cookie['value'],
+                            domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+def fetch_page_http(driver, url, thread_id):
+    """Fetch a page over the pooled HTTP session
+    
+    Returns the raw HTML bytes (BeautifulSoup decodes them from the page's own
+    charset, so requests never decodes or guesses one), or None when the page
+    needs the real browser (Cloudflare challenge, network error). Plain HTTP is
+    given up for the thread after HTTP_FAILURE_LIMIT failures in a row.
+    """
+    session = get_http_session(driver)
+    if http_state.failures >= HTTP_FAILURE_LIMIT:
+        return None
+    
+    try:
+        response = session.get(url, timeout=HTTP_TIMEOUT)
+    except requests.RequestException:
+        http_state.failures += 1
+        return None
+    
+    if response.status_code == 429:
+        print(f"    [{thread_id}] ⏳ Rate limited, pausing all threads for {RATE_LIMIT_BACKOFF}s")
+        report_rate_limited()
+        return b""
+    
+    html = response.content
+    if response.status_code not in HTTP_OK_STATUSES or any(marker in html for marker in CHALLENGE_MARKERS_BYTES):
+        http_state.failures += 1
+        return None
+    
+    http_state.failures = 0
+    return html
+
+def parse_product_page_fast(html):
+    """selectolax version of parse_product_page (same rows, same text rules)"""
+    tree = LexborHTMLParser(html)
+    prices = {}
+    
+    for row in tree.css(f'[class="{PRICE_ROW_CLASS}"]'):
+        for dt, dd in zip(row.css('dt'), row.css('dd')):
+            label = dt.text(strip=True)
+            value = dd.text(strip=True).replace('€', '').strip()
+            prices[label] = value
+    
+    product_name_elem = tree.css_first('h1')
+    product_name = product_name_elem.text(strip=True) if product_name_elem else "Unknown"
+    return prices, product_name
+
+def parse_product_page(html):
+    """Extract the price table and product name from a product page
+    
+    Uses selectolax when installed. Otherwise only <h1> and <dl> elements are
+    turned into a BeautifulSoup tree; the full page is parsed only if no price
+    rows turn up that way.
+    """
+    if LexborHTMLParser:
+        return parse_product_page_fast(html)
+    
+    soup = BeautifulSoup(html, HTML_PARSER, parse_only=PRODUCT_PAGE_STRAINER)
+    price_rows = soup.find_all(class_=PRICE_ROW_CLASS)
+    if not price_rows:
+        soup = BeautifulSoup(html, HTML_PARSER)
+        price_rows = soup.find_all(class_=PRICE_ROW_CLASS)
+    prices = {}
+    
+    for row in price_rows:
+        dts = row.find_all('dt')
+        dds = row.find_all('dd')
+        
+        for dt, dd in zip(dts, dds):
+            label = dt.get_text(strip=True)
+            value = dd.get_text(strip=True).replace('€', '').strip()
+            prices[label] = value
+    
+    product_name_elem = soup.find('h1')
+    product_name = product_name_elem.get_text(strip=True) if product_name_elem else "Unknown"
+    return prices, product_name
+
+def read_product_page(driver):
+    """Extract the price table and product name from the page open in Chrome"""
+    prices, product_name = driver.execute_script(PRODUCT_PAGE_SCRIPT, PRICE_ROW_CLASS)
+    prices = {label: value.replace('€', '').strip() for label, value in prices.items()}
+    return prices, product_name or "Unknown"
 
 def try_scrape_url(driver, url, thread_id):
-    """Attempt to scrape a single URL and return prices if found"""
+    """Attempt to scrape a single URL and return prices if found
+    
+    The page is fetched over plain HTTP when possible and only loaded in
+    Chrome when Cloudflare asks for a challenge.
+    """
     try:
         print(f"  [{thread_id}] Loading: {url}")
-        driver.get(url)
-        time.sleep(random.uniform(5, 12))
+        wait_for_request_slot()
+        html = fetch_page_http(driver, url, thread_id)
         
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CLASS_NAME, "labeled"))
-            )
-        except:
-            pass
-        
-        time.sleep(1)
-        
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        price_rows = soup.find_all(class_='labeled row mx-auto g-0')
-        prices = {}
-        
-        for row in price_rows:
-            dts = row.find_all('dt')
-            dds = row.find_all('dd')
+        if html is None:
+            driver.get(url)
+            
+            if '429' in driver.title or 'Too Many Requests' in driver.title:
+                print(f"    [{thread_id}] ⏳ Rate limited, pausing all threads for {RATE_LIMIT_BACKOFF}s")
+                report_rate_limited()
+                return {}, "Unknown"
+            
+            try:
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.CLASS_NAME, "labeled"))
+                )
+            except:
+                pass
             
-            for dt, dd in zip(dts, dds):
-                label = dt.get_text(strip=True)
-                value = dd.get_text(strip=True).replace('€', '').strip()
-                prices[label] = value
+            # The browser may have just solved a challenge; share the fresh cookies
+            sync_browser_cookies(driver, get_http_session(driver))
+            return read_product_page(driver)
+        
+        if not html:
+            # Rate limited over HTTP
+            return {}, "Unknown"
         
-        product_name_elem = soup.find('h1')
-        product_name = product_name_elem.get_text(strip=True) if product_name_elem else "Unknown"
+        prices, product_name = parse_product_page(html)
         # print(f"    [{thread_id}] 🧾 Extracted prices:", prices)
         return prices, product_name
     except Exception as e:
@@ -629,6 +979,18 @@ def try_strategy_first(driver, card_info, english_names, strategy, thread_id):
 def get_cache_key(card_info):
     return card_info["set_folder"]
 
+def record_price_history(result, card_info, price_history):
+    """Add today's 30-day average to the card's price history (at most one entry per day)"""
+    price_30d = extract_30d_price(result.get('prices', {}))
+    uid = build_card_uid(card_info)
+    history = price_history.get(uid, [])
+    if price_30d is not None:
+        today = datetime.now().strftime('%Y-%m-%d')
+        if not history or history[-1]['date'] != today:
+            history.append({"date": today, "price": price_30d})
+    price_history[uid] = history
+    result['price_history'] = history
+
 def scrape_single_card(driver, url, card_info, english_names, strategy_cache, price_history, existing_results):
     """Scrape price data for a single card with multiple fallback strategies"""
     thread_id = threading.current_thread().name
@@ -638,19 +1000,9 @@ def scrape_single_card(driver, url, card_info, english_names, strategy_cache, pr
     print(f"    [{thread_id}] 🎯 Trying saved URL first")
     result = execute_saved_url_strategy(driver, card_info, existing_results, thread_id)
     if result:
-        # Update price history...
-        price_30d = extract_30d_price(result.get('prices', {}))
-        today = datetime.now().strftime('%Y-%m-%d')
-        uid = build_card_uid(card_info)
-        history = price_history.get(uid, [])
-        if price_30d is not None and (not history or history[-1]['date'] != today):
-            history.append({"date": today, "price": price_30d})
-        price_history[uid] = history
-        result['price_history'] = history
+        record_price_history(result, card_info, price_history)
         return result
     
-    time.sleep(15)
-    
     # Try cached strategies FIRST (per set)
     cache_key = get_cache_key(card_info)
     preferred_list = strategy_cache.get(cache_key, [])
@@ -670,15 +1022,7 @@ def scrape_single_card(driver, url, card_info, english_names, strategy_cache, pr
             driver, card_info, english_names, preferred, thread_id
         )
         if result:
-            # Update price history...
-            price_30d = extract_30d_price(result.get('prices', {}))
-            today = datetime.now().strftime('%Y-%m-%d')
-            uid = build_card_uid(card_info)
-            history = price_history.get(uid, [])
-            if price_30d is not None and (not history or history[-1]['date'] != today):
-                history.append({"date": today, "price": price_30d})
-            price_history[uid] = history
-            result['price_history'] = history
+            record_price_history(result, card_info, price_history)
             return result
 
         
@@ -706,8 +1050,6 @@ def scrape_single_card(driver, url, card_info, english_names, strategy_cache, pr
         if result:
             print(f"    [{thread_id}] ✅ Success with {strategy_name}!")
             return result
-        
-        time.sleep(5)
     
     # All strategies failed
     print(f"    [{thread_id}] ✗ No prices found after trying all strategies")
@@ -752,7 +1094,7 @@ def execute_english_name_strategy(driver, card_info, english_names, thread_id):
         return None
         
     english_sanitized = sanitize_card_name(english_name)
-    original_sanitized = sanitize_card_name(card_info['card_name'])
+    original_sanitized = card_info['card_name_sanitized']
     
     if english_sanitized == original_sanitized:
         return None
@@ -816,7 +1158,9 @@ def execute_set_id_strategy(driver, card_info, thread_id):
 
 def execute_extended_abbr_strategy(driver, card_info, thread_id):
     """Execute extended abbreviation strategy"""
-    extended_abbr = get_extended_abbreviation(card_info['set_name'], card_info['set_abbreviation'])
+    extended_abbr = card_info.get('set_abbreviation_extended')
+    if extended_abbr is None:
+        extended_abbr = get_extended_abbreviation(card_info['set_name'], card_info['set_abbreviation'])
     if not extended_abbr or extended_abbr == card_info['set_abbreviation']:
         return None
         
@@ -906,9 +1250,8 @@ def execute_v2_set_id_strategy(driver, card_info, thread_id):
 def _search_with_name(driver, card_info, thread_id, search_name):
     """Internal helper to search CardMarket using a given card name"""
     try:
-        base_url = "https://www.cardmarket.com/fr/Pokemon/Products/Singles"
-        driver.get(base_url)
-        time.sleep(random.uniform(5, 12))
+        wait_for_request_slot()
+        driver.get(SINGLES_URL)
 
         # Expansion selection
         expansion_select = WebDriverWait(driver, 10).until(
@@ -916,12 +1259,18 @@ def _search_with_name(driver, card_info, thread_id, search_name):
         )
 
         set_first_word = card_info['set_name'].replace('-', ' ')
+        initial_expansion = expansion_select.get_attribute('value')
         expansion_select.click()
-        time.sleep(0.5)
         expansion_select.send_keys(set_first_word)
-        time.sleep(1)
+        # Go on as soon as the typed name has picked an expansion (at most 1s, as before)
+        try:
+            WebDriverWait(driver, 1).until(
+                lambda d: expansion_select.get_attribute('value') != initial_expansion
+            )
+        except:
+            pass
         expansion_select.send_keys(Keys.RETURN)
-        time.sleep(2)
+        wait_for_navigation(driver, expansion_select, timeout=2)
 
         # Search input
         search_form = WebDriverWait(driver, 10).until(
@@ -932,9 +1281,9 @@ def _search_with_name(driver, card_info, thread_id, search_name):
         search_input.clear()
         search_input.send_keys(search_name)
         search_input.send_keys(Keys.RETURN)
-        time.sleep(3)
+        wait_for_navigation(driver, search_input)
 
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
+        soup = BeautifulSoup(driver.page_source, HTML_PARSER, parse_only=SEARCH_LINKS_STRAINER)
         product_links = soup.find_all('a', href=True)
         card_num_clean = card_info['card_number'].upper().strip()
 
@@ -945,8 +1294,7 @@ def _search_with_name(driver, card_info, thread_id, search_name):
             if card_num_clean in href.upper() or card_num_clean in text:
                 if '/Singles/' in href:
                     full_url = f"https://www.cardmarket.com{href}" if href.startswith('/') else href
-                    full_url = re.sub(
-                        r'\?language=\d+',
+                    full_url = LANGUAGE_PARAM.sub(
                         f'?language={LANGUAGE_MAP[card_info["language"]]}',
                         full_url
                     )
@@ -1015,7 +1363,7 @@ def execute_search_strategy(driver, card_info, english_names, thread_id):
     print(f"    [{thread_id}] ✗ Search failed (including English fallback)")
     return None
       
-def worker_thread(thread_id, task_queue, results_list, output_file, save_interval, price_history, existing_results):
+def worker_thread(thread_id, task_queue, results_list, checkpoint, price_history, existing_results):
     """Worker thread that processes cards from the queue"""
     print(f"[Thread-{thread_id}] Starting worker thread")
     
@@ -1025,7 +1373,6 @@ def worker_thread(thread_id, task_queue, results_list, output_file, save_interva
     for attempt in range(max_retries):
         try:
             driver = initialize_driver()
-            strategy_cache = load_strategy_cache()
             print(f"[Thread-{thread_id}] Browser initialized successfully")
             break
         except Exception as e:
@@ -1036,7 +1383,7 @@ def worker_thread(thread_id, task_queue, results_list, output_file, save_interva
                 print(f"[Thread-{thread_id}] Could not initialize browser after {max_retries} attempts. Exiting thread.")
                 return
     
-    cards_processed = 0
+    warm_up_browser(driver, thread_id)
     
     try:
         while True:
@@ -1050,14 +1397,11 @@ def worker_thread(thread_id, task_queue, results_list, output_file, save_interva
                 
                 result = scrape_single_card(driver, url, card_info, english_names, strategy_cache, price_history, existing_results)
                 results_list.append(result)
-                cards_processed += 1
-                
-                if cards_processed % save_interval == 0:
-                    print(f"    [Thread-{thread_id}] 💾 Auto-saving progress...")
-                    save_results(results_list, output_file)
+                # Failed cards are retried after a crash anyway, only successes are worth keeping
+                if result.get('success'):
+                    write_checkpoint(checkpoint, result)
                 
                 task_queue.task_done()
-                time.sleep(1)
                 
             except queue.Empty:
                 continue
@@ -1087,24 +1431,29 @@ def scan_and_scrape(base_folder, output_file=None, num_threads=4):
     
     print("Loading existing results...")
     existing_results, set_strategies, price_history = load_existing_results(output_file)
-    print(f"Found {len(existing_results)} cards already scraped today")
+    print(f"Found {len(existing_results)} cards {RESULTS_REUSED}")
+    
+    checkpoint_file = output_file + CHECKPOINT_SUFFIX
+    recovered = recover_checkpoint(checkpoint_file, existing_results, price_history)
+    if recovered:
+        print(f"Recovered {len(recovered)} cards from an interrupted run")
     
     all_results = []
     skipped_count = 0
-    save_interval = 5
     task_queue = queue.Queue()
-    set_abbreviations = {}
     
     print("\nScanning cards...")
     total_cards = 0
     
-    for set_folder in base_path.iterdir():
-        if not set_folder.is_dir():
-            continue
-        
-        set_name = get_set_name(set_folder.name)
-        set_id = get_set_id_from_folder(set_folder.name)
-        set_abbr = set_abbreviations.get(set_folder.name, get_set_abbreviation(set_name))
+    # DirEntry.is_dir() reuses the type from the listing; only set folders become Paths
+    with os.scandir(base_path) as entries:
+        set_folders = [Path(entry.path) for entry in entries if entry.is_dir()]
+    
+    for set_folder in set_folders:
+        folder_name = set_folder.name
+        set_name = get_set_name(folder_name)
+        set_id = get_set_id_from_folder(folder_name)
+        set_abbr = get_set_abbreviation(set_name)
         
         if not set_abbr:
             continue
@@ -1114,6 +1463,9 @@ def scan_and_scrape(base_folder, output_file=None, num_threads=4):
             continue
         
         english_names = load_english_card_names(set_folder)
+        # Resolved once per set rather than for every card in it
+        ptcgo_code = get_ptcgo_code_for_set(folder_name)
+        extended_abbr = get_extended_abbreviation(set_name, set_abbr)
         
         for lang in ['EN', 'FR', 'DE']:
             lang_folder = renamed_cropped_path / lang
@@ -1122,99 +1474,113 @@ def scan_and_scrape(base_folder, output_file=None, num_threads=4):
                 continue
             
             lang_code = LANGUAGE_MAP[lang]
-            card_files = [f for f in lang_folder.iterdir() 
-                         if f.suffix.lower() in ['.jpg', '.jpeg', '.png'] 
-                         and '_FRONT' in f.name]
+            # DirEntry carries the file type from the listing, no stat per file
+            with os.scandir(lang_folder) as entries:
+                card_files = [entry.name for entry in entries
+                              if '_FRONT' in entry.name
+                              and os.path.splitext(entry.name)[1].lower() in CARD_IMAGE_SUFFIXES
+                              and entry.is_file()]
             
-            for card_file in card_files:
-                card_name, card_number = parse_card_filename(card_file.name)
+            for filename in card_files:
+                card_name, card_number = parse_card_filename(filename)
                 
                 if not card_name or not card_number:
                     continue
                 
-                card_info_check = {
-                    'set_folder': set_folder.name,
-                    'filename': card_file.name
-                }
+                # One lookup both checks for and fetches a recent result
+                existing_result = existing_results.get((folder_name, filename))
                 
-                if is_card_scraped_today(card_info_check, existing_results):
+                if existing_result is not None:
                     skipped_count += 1
-                    key = f"{card_info_check['set_folder']}_{card_info_check['filename']}"
-                    existing_result = existing_results[key].copy()
                     
-                    # Preserve price history from price_history dict
-                    uid = build_card_uid(existing_result['card_info'])
-                    if uid in price_history and 'price_history' not in existing_result:
-                        existing_result['price_history'] = price_history[uid]
+                    # Preserve price history from price_history dict (the saved
+                    # result is only copied when it actually gets one added)
+                    if 'price_history' not in existing_result:
+                        uid = build_card_uid(existing_result['card_info'])
+                        if uid in price_history:
+                            existing_result = existing_result.copy()
+                            existing_result['price_history'] = price_history[uid]
                     
                     all_results.append(existing_result)
                     continue
                 
                 sanitized_card_name = sanitize_card_name(card_name)
-                current_abbr = set_abbreviations.get(set_folder.name, set_abbr)
-                url = build_cardmarket_url(set_name, sanitized_card_name, current_abbr, card_number, lang_code)
+                url = build_cardmarket_url(set_name, sanitized_card_name, set_abbr, card_number, lang_code)
                 
                 card_info = {
-                    'set_folder': set_folder.name,
+                    'set_folder': folder_name,
                     'set_name': set_name,
-                    'set_abbreviation': current_abbr,
+                    'set_abbreviation': set_abbr,
+                    'set_abbreviation_extended': extended_abbr,
                     'set_id': set_id,
-                    'ptcgo_code': get_ptcgo_code_for_set(set_folder.name),
+                    'ptcgo_code': ptcgo_code,
                     'card_name': card_name,
                     'card_name_sanitized': sanitized_card_name,
                     'card_number': card_number,
                     'language': lang,
-                    'filename': card_file.name
+                    'filename': filename
                 }
                 
                 task_queue.put((url, card_info, english_names))
                 total_cards += 1
     
     print(f"Found {total_cards} cards to scrape")
-    print(f"Skipped {skipped_count} cards (already scraped today)")
+    print(f"Skipped {skipped_count} cards ({RESULTS_REUSED})")
+    
+    # No point starting a browser per thread for fewer cards than threads
+    num_threads = min(num_threads, total_cards)
     print(f"\nStarting {num_threads} worker threads...\n")
     
     threads = []
-    for i in range(num_threads):
-        thread = threading.Thread(
-            target=worker_thread,
-            args=(i+1, task_queue, all_results, output_file, save_interval, price_history, existing_results),
-            name=f"Thread-{i+1}"
-        )
-        thread.start()
-        threads.append(thread)
-        time.sleep(1)
-    
-    task_queue.join()
-    
-    for _ in range(num_threads):
-        task_queue.put(None)
-    
-    for thread in threads:
-        thread.join()
+    # Line buffered: every card reaches the file as soon as it is written
+    with open(checkpoint_file, 'a', encoding='utf-8', buffering=1) as checkpoint:
+        for i in range(num_threads):
+            thread = threading.Thread(
+                target=worker_thread,
+                args=(i+1, task_queue, all_results, checkpoint, price_history, existing_results),
+                name=f"Thread-{i+1}"
+            )
+            thread.start()
+            threads.append(thread)
+        
+        task_queue.join()
+        
+        for _ in range(num_threads):
+            task_queue.put(None)
+        
+        for thread in threads:
+            thread.join()
     
     print(f"\n{'='*60}")
     print(f"Scraping complete!")
     print(f"{'='*60}")
     
+    # Recovered cards outside this scan are only in the checkpoint, which is
+    # deleted after the save: keep them in the results file
+    if recovered:
+        scanned = {(r['card_info'].get('set_folder'), r['card_info'].get('filename'))
+                   for r in all_results if 'card_info' in r}
+        all_results.extend(result for key, result in recovered.items() if key not in scanned)
+    
     print(f"💾 Saving final results...")
     if save_results(all_results, output_file):
         print(f"✓ Results saved to: {output_file}")
+        os.remove(checkpoint_file)
     else:
         print(f"✗ Failed to save results")
     
     successful = sum(1 for r in all_results if r.get('success', False))
-    failed = sum(1 for r in all_results if not r.get('success', False))
+    failed = len(all_results) - successful
     print(f"\nSummary:")
     print(f"  ✓ Successful: {successful}")
-    print(f"  ⭐ Skipped (already scraped today): {skipped_count}")
+    print(f"  ⭐ Skipped ({RESULTS_REUSED}): {skipped_count}")
     print(f"  ✗ Failed: {failed}")
     print(f"  📊 Total in file: {len(all_results)}")
 
 if __name__ == "__main__":
     base_path_def = input(r"Base folder path (D:\05-Pokemon\01-Collection or D:\05-Pokemon\02-vente) : ")
     base_folder = base_path_def
-    num_threads = 1
+    num_threads = WORKER_THREADS
     
     print("="*60)
     print("Cardmarket Multithreaded Price Scraper")
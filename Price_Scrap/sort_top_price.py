@@ -1,11 +1,22 @@
 import json
 import csv
+from operator import itemgetter
 
-# Charger le fichier JSON
-with open('price_scrap/cardmarket_all_prices.json', 'r', encoding='utf-8') as f:
-    data = json.load(f)
+# orjson (optionnel) décode le gros fichier de prix bien plus vite que json
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-# Extraire et trier les cartes
+# Charger le fichier JSON
+if orjson:
+    with open('price_scrap/cardmarket_all_prices.json', 'rb') as f:
+        data = orjson.loads(f.read())
+else:
+    with open('price_scrap/cardmarket_all_prices.json', 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+# Extraire et trier les cartes (nom, extension, prix)
 cards_sorted = []
 
 for result in data.get('results', []):
@@ -21,26 +32,24 @@ for result in data.get('results', []):
         except (ValueError, AttributeError):
             tendance = 0.0
         
-        cards_sorted.append({
-            'Nom': card_info.get('card_name', 'N/A'),
-            'Extension': card_info.get('set_name', 'N/A'),
-            'Prix': tendance
-        })
+        cards_sorted.append((
+            card_info.get('card_name', 'N/A'),
+            card_info.get('set_name', 'N/A'),
+            tendance
+        ))
 
 # Trier par prix décroissant
-cards_sorted.sort(key=lambda x: x['Prix'], reverse=True)
+cards_sorted.sort(key=itemgetter(2), reverse=True)
 
 # Sauvegarder en TXT
 with open('price_scrap/cartes_triees_par_prix.txt', 'w', encoding='utf-8') as f:
-    for card in cards_sorted:
-        f.write(f"{card['Nom']} - {card['Extension']} - {card['Prix']}€\n")
+    f.writelines(f"{nom} - {extension} - {prix}€\n" for nom, extension, prix in cards_sorted)
 
 # Sauvegarder en CSV
 with open('price_scrap/cartes_triees_par_prix.csv', 'w', encoding='utf-8', newline='') as f:
     writer = csv.writer(f)
     writer.writerow(['Name', 'Extension', 'Price'])
-    for card in cards_sorted:
-        writer.writerow([card['Nom'], card['Extension'], card['Prix']])
+    writer.writerows(cards_sorted)
 
 print(f"✓ {len(cards_sorted)} cartes triées et sauvegardées dans 'price_scrap/'")
 print("  - cartes_triees_par_prix.txt")
@@ -48,5 +57,5 @@ print("  - cartes_triees_par_prix.csv")
 
 # Afficher les 10 premières cartes
 print("\nTop 10 des cartes par tendance de prix :")
-for i, card in enumerate(cards_sorted[:10], 1):
-    print(f"{i}. {card['Nom']} - {card['Extension']} - {card['Prix']}€")
\ No newline at end of file
+for i, (nom, extension, prix) in enumerate(cards_sorted[:10], 1):
+    print(f"{i}. {nom} - {extension} - {prix}€")
\ No newline at end of file
@@ -1,6 +1,7 @@
 import cv2
 import numpy as np
 import os
+import re
 import sys
 import json
 import csv
@@ -8,6 +9,9 @@ import pickle
 from pathlib import Path
 from threading import Thread, Lock
 from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from functools import lru_cache
 import time
 import shutil
 
@@ -19,28 +23,63 @@ from cards_utils import (
     CardCropper,
     sanitize_filename, 
     get_unique_filename, 
+    save_image,
     extract_set_code
 )
 
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
 
+# Set codes such as SV6, split into letters and number for zero-padding
+SET_CODE_PATTERN = re.compile(r'^([A-Za-z]+)(\d+)$')
+
 # Global lock for user interaction
 user_interaction_lock = Lock()
 csv_write_lock = Lock()
 
+# Pairs cropped ahead of the one being matched. Matching waits on the user, so
+# this stays small: every prefetched pair holds full-resolution images in memory
+CROP_PREFETCH = 2
+
+SETS_FILE = Path('PokemonCardLists/all_sets_full.json')
+
+@lru_cache(maxsize=None)
+def load_all_sets():
+    """Parse all_sets_full.json once per run and return its list of sets (shared - do not modify)"""
+    with open(SETS_FILE, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    if isinstance(data, dict):
+        return data.get('data', [])
+    if isinstance(data, list):
+        return data
+    return []
+
 class CardMatcher:
     """Match cropped cards against reference images using computer vision"""
     
+    # Number of references (ranked by color histogram) that get the full ORB comparison
+    PREFILTER_CANDIDATES = 20
+    # The rest of the set is only skipped when the pre-filtered winner is this
+    # clear: above the score and ahead of the runner-up by the margin. Anything
+    # less is scanned in full before the usual 0.25 auto-accept is applied
+    PREFILTER_ACCEPT_SCORE = 0.35
+    PREFILTER_ACCEPT_MARGIN = 0.10
+    
     def __init__(self, set_code, base_path='PokemonCardLists/Card_Sets'):
         self.set_code = set_code
         self.base_path = Path(base_path)
         self.reference_images = {}
+        self.reference_features = {}  # card_id -> (size, keypoint_count, descriptors)
+        self.reference_histograms = {}  # card_id -> normalized HSV histogram
         self.card_info_map = {}
         self.csv_path = None
         self.current_language = None
         self.use_pokedex = False
         self.pokedex_db = None
+        # Created once per matcher (one matcher per language thread) and reused for every comparison
+        self.orb = cv2.ORB_create(nfeatures=2000)
+        self.bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
         self.load_reference_images()
         self.learning = LearningSystem(self.set_code)
         self.check_if_old_set()
@@ -109,9 +148,7 @@ class CardMatcher:
             
     def check_if_old_set(self):
         """Check if this is a pre-2002 set that needs Pokedex for JA language"""
-        sets_file = Path('PokemonCardLists/all_sets_full.json')
-        
-        if not sets_file.exists():
+        if not SETS_FILE.exists():
             old_set_prefixes = ['base', 'jungle', 'fossil', 'base2', 'gym1', 'gym2', 
                                'neo1', 'neo2', 'neo3', 'neo4', 'legendary']
             if any(self.set_code.lower().startswith(prefix) for prefix in old_set_prefixes):
@@ -122,15 +159,7 @@ class CardMatcher:
             return
         
         try:
-            with open(sets_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if isinstance(data, dict):
-                all_sets = data.get('data', [])
-            elif isinstance(data, list):
-                all_sets = data
-            else:
-                all_sets = []
+            all_sets = load_all_sets()
             
             found_set = False
             for set_info in all_sets:
@@ -172,8 +201,7 @@ class CardMatcher:
         # NEW: Try with zero-padded version (e.g., SV6 -> SV06)
         if not set_folders:
             # Split letters and numbers
-            import re
-            match = re.match(r'^([A-Za-z]+)(\d+)$', self.set_code)
+            match = SET_CODE_PATTERN.match(self.set_code)
             if match:
                 letters = match.group(1)
                 numbers = match.group(2)
@@ -212,6 +240,9 @@ class CardMatcher:
                 img = cv2.imread(str(img_path))
                 if img is not None:
                     self.reference_images[card_id] = img
+                    size = self.reference_size(img)
+                    self.reference_features[card_id] = (size,) + self.extract_features(img, size)
+                    self.reference_histograms[card_id] = self.color_histogram(img)
         
         print(f"  ✓ Loaded {len(self.reference_images)} reference images")
     
@@ -385,39 +416,54 @@ class CardMatcher:
             else:
                 print(f"\n✗ Card not found")               
     
-    def resize_to_match(self, img1, img2):
-        """Resize images to same dimensions"""
-        h1, w1 = img1.shape[:2]
-        h2, w2 = img2.shape[:2]
-        
-        target_h = min(h1, h2, 800)
-        target_w = min(w1, w2, 600)
-        
-        return cv2.resize(img1, (target_w, target_h)), cv2.resize(img2, (target_w, target_h))
-    
-    def compare_images_features(self, img1, img2):
-        """Compare images using ORB feature matching"""
-        img1_resized, img2_resized = self.resize_to_match(img1, img2)
-        
-        gray1 = cv2.cvtColor(img1_resized, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(img2_resized, cv2.COLOR_BGR2GRAY)
-        
-        orb = cv2.ORB_create(nfeatures=2000)
-        kp1, des1 = orb.detectAndCompute(gray1, None)
-        kp2, des2 = orb.detectAndCompute(gray2, None)
+    def reference_size(self, img):
+        """Size both images are resized to before comparing against this reference"""
+        h, w = img.shape[:2]
+        return min(w, 600), min(h, 800)
+    
+    def extract_features(self, img, size):
+        """Resize to the comparison size and compute ORB keypoint count + descriptors"""
+        gray = cv2.cvtColor(cv2.resize(img, size), cv2.COLOR_BGR2GRAY)
+        kp, des = self.orb.detectAndCompute(gray, None)
+        return len(kp), des
+    
+    def color_histogram(self, img):
+        """Normalized hue/saturation histogram, a cheap first-pass card fingerprint"""
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, [30, 32], [0, 180, 0, 256])
+        return cv2.normalize(hist, hist).flatten()
+    
+    def score_features(self, features1, features2):
+        """Score two (keypoint_count, descriptors) pairs using ORB feature matching"""
+        kp1, des1 = features1
+        kp2, des2 = features2
         
         if des1 is None or des2 is None:
             return 0.0
         
-        bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-        matches = bf.match(des1, des2)
-        matches = sorted(matches, key=lambda x: x.distance)
+        matches = self.bf.match(des1, des2)
         
         if len(matches) == 0:
             return 0.0
         
         good_matches = [m for m in matches if m.distance < 50]
-        return len(good_matches) / max(len(kp1), len(kp2))
+        return len(good_matches) / max(kp1, kp2)
+    
+    def score_candidates(self, cropped_image, card_ids, query_features, blacklisted):
+        """ORB-score the cropped card against the given references, skipping blacklisted ones"""
+        matches = []
+        for card_id in card_ids:
+            if card_id in blacklisted:
+                continue
+            size, ref_kp, ref_des = self.reference_features[card_id]
+            try:
+                if size not in query_features:
+                    query_features[size] = self.extract_features(cropped_image, size)
+                score = self.score_features(query_features[size], (ref_kp, ref_des))
+                matches.append((card_id, score))
+            except:
+                continue
+        return matches
     
     def match_card(self, cropped_image, show_top_matches=3):
         """Find the best matching card - THREAD SAFE for user prompts"""
@@ -436,15 +482,28 @@ class CardMatcher:
         if not self.reference_images:
             return None
         
-        matches = []
-        for card_id, ref_img in self.reference_images.items():
-            if self.learning.is_blacklisted(cropped_image, card_id):
-                continue
-            try:
-                score = self.compare_images_features(cropped_image, ref_img)
-                matches.append((card_id, score))
-            except:
-                continue
+        # Rank references by color histogram, then run ORB on the closest ones only
+        query_histogram = self.color_histogram(cropped_image)
+        candidates = sorted(
+            self.reference_features,
+            key=lambda card_id: cv2.compareHist(query_histogram, self.reference_histograms[card_id],
+                                                cv2.HISTCMP_CORREL),
+            reverse=True
+        )
+        
+        # Features of the cropped card are computed once per reference size, not once per reference
+        query_features = {}
+        # Rejected cards are looked up once for both passes
+        blacklisted = self.learning.blacklisted_ids(cropped_image)
+        matches = self.score_candidates(cropped_image, candidates[:self.PREFILTER_CANDIDATES],
+                                        query_features, blacklisted)
+        
+        # A wrong card can still top the colour ranking (lighting, holo), so scan the
+        # rest of the set unless the pre-filtered winner is unambiguous
+        scores = sorted((score for _, score in matches), reverse=True) + [0.0, 0.0]
+        if scores[0] <= self.PREFILTER_ACCEPT_SCORE or scores[0] - scores[1] < self.PREFILTER_ACCEPT_MARGIN:
+            matches += self.score_candidates(cropped_image, candidates[self.PREFILTER_CANDIDATES:],
+                                             query_features, blacklisted)
         
         matches.sort(key=lambda x: x[1], reverse=True)
         
@@ -512,22 +571,12 @@ class CardMatcher:
          
 def load_set_names_mapping():
     """Load set names from all_sets_full.json"""
-    json_path = Path('PokemonCardLists/all_sets_full.json')
-    
-    if not json_path.exists():
+    if not SETS_FILE.exists():
         print(f"⚠ Warning: all_sets_full.json not found")
         return {}
     
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if isinstance(data, dict):
-            all_sets = data.get('data', [])
-        elif isinstance(data, list):
-            all_sets = data
-        else:
-            return {}
+        all_sets = load_all_sets()
         
         # Map set code to set name
         set_mapping = {}
@@ -544,6 +593,10 @@ def load_set_names_mapping():
         print(f"⚠ Error loading set names: {e}")
         return {}
 
+def format_collection_line(card_name_en, set_name, card_number):
+    """Format one collection_list.txt line (e.g. Ampharos Pokemon Neo Genesis set #1)"""
+    return f"{card_name_en} Pokemon {set_name} set #{card_number}\n"
+
 def append_to_collection_list(card_name_en, set_name, card_number):
     """Append a card to the collection_list.txt file"""
     collection_file = Path('PokemonTCGAPI/collection_list.txt')
@@ -551,11 +604,8 @@ def append_to_collection_list(card_name_en, set_name, card_number):
     # Create directory if doesn't exist
     collection_file.parent.mkdir(parents=True, exist_ok=True)
     
-    # Format: "Ampharos Pokemon Neo Genesis set #1"
-    line = f"{card_name_en} Pokemon {set_name} set #{card_number}\n"
-    
     with open(collection_file, 'a', encoding='utf-8') as f:
-        f.write(line)
+        f.write(format_collection_line(card_name_en, set_name, card_number))
 
 def write_to_csv(csv_path, card_data):
     """Thread-safe CSV writing"""
@@ -572,6 +622,49 @@ def write_to_csv(csv_path, card_data):
             
             writer.writerow(card_data)
 
+def crop_pair(front_path, back_path):
+    """Crop a front/back image pair - runs in a worker thread"""
+    cropped_front = CardCropper(front_path).crop_card_advanced()
+    back_cropped = None
+    if back_path:
+        back_cropped = CardCropper(back_path).crop_card_advanced(is_back=True)
+    return cropped_front, back_cropped
+
+def iter_cropped_pairs(pair_paths, prefetch=CROP_PREFETCH):
+    """Yield crop futures in order, keeping at most prefetch pairs cropping ahead"""
+    with ThreadPoolExecutor(max_workers=prefetch) as executor:
+        pending = deque()
+        for front_path, back_path in pair_paths:
+            pending.append(executor.submit(crop_pair, front_path, back_path))
+            if len(pending) > prefetch:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+def store_pair(images, raw_paths, processed_dir, csv_path, csv_data, collection_entry):
+    """Write a matched pair's images and records - runs on the language's writer thread"""
+    for output_path, image in images:
+        save_image(output_path, image)
+    
+    # Move processed raw images to processed folder
+    os.makedirs(processed_dir, exist_ok=True)
+    
+    try:
+        for raw_path in raw_paths:
+            shutil.move(raw_path, os.path.join(processed_dir, os.path.basename(raw_path)))
+        
+        if len(raw_paths) > 1:
+            print(f"\n Moved to processed folder")
+    
+    except Exception as move_error:
+        print(f"\n Could not move files: {move_error}")
+    
+    # Write to CSV (thread-safe)
+    write_to_csv(csv_path, csv_data)
+    
+    # Append to collection_list.txt (thread-safe)
+    append_to_collection_list(*collection_entry)
+
 def process_language_folder(folder_path, language, set_code, output_folder, csv_path, set_name):
     """Process a single language folder - designed to run in thread"""
     
@@ -584,42 +677,47 @@ def process_language_folder(folder_path, language, set_code, output_folder, csv_
     search_path = os.path.join(folder_path, 'raw', language)
     output_dir = os.path.join(folder_path, output_folder, language)
     os.makedirs(output_dir, exist_ok=True)
+    # Listed once; get_unique_filename keeps it up to date as files are written
+    existing_files = set(os.listdir(output_dir))
     
-    extensions = ['.jpg', '.jpeg', '.png', '.bmp']
-    image_files = sorted([f for f in os.listdir(search_path) 
-                   if any(f.lower().endswith(ext) for ext in extensions)])
+    extensions = ('.jpg', '.jpeg', '.png', '.bmp')
+    with os.scandir(search_path) as entries:
+        image_files = sorted(e.name for e in entries
+                             if e.is_file() and e.name.lower().endswith(extensions))
     
     print(f"[{language}] Found {len(image_files)} images ({len(image_files)//2} pairs)")
     
-    i = 0
-    pair_number = 1
+    # Images alternate front/back (1 front, 2 back, 3 front...); a trailing front has no back
+    pairs = list(zip(image_files[0::2], image_files[1::2]))
+    if len(image_files) % 2:
+        pairs.append((image_files[-1], None))
+    
+    # Crop the next pairs in background threads while this thread matches (and waits on user input)
+    pair_paths = [(os.path.join(search_path, front_filename),
+                   os.path.join(search_path, back_filename) if back_filename else None)
+                  for front_filename, back_filename in pairs]
+    cropped_pairs = iter_cropped_pairs(pair_paths)
+    
+    processed_dir = os.path.join(folder_path, 'raw', language, 'processed')
+    # A single writer keeps the CSV and collection list in match order
+    writer = ThreadPoolExecutor(max_workers=1)
+    pending_writes = []
+    
     success_count = 0
     
-    while i < len(image_files):
-        front_filename = image_files[i]
+    for pair_number, ((front_filename, back_filename), (front_path, back_path), crop_future) in enumerate(
+            zip(pairs, pair_paths, cropped_pairs), 1):
         
         print(f"\n[{language}] Pair {pair_number}/{len(image_files)//2}")
         
-        front_path = os.path.join(search_path, front_filename)
-        
         try:
-            cropper = CardCropper(front_path)
-            if cropper.image is None:
-                i += 2
-                pair_number += 1
-                continue
-            
-            cropped_front = cropper.crop_card_advanced()
+            cropped_front, back_cropped = crop_future.result()
             if cropped_front is None:
-                i += 2
-                pair_number += 1
                 continue
             
             card_info = matcher.match_card(cropped_front)
     
             if not card_info:
-                i += 2
-                pair_number += 1
                 continue
             
             # Get filename name (language-specific for file)
@@ -635,46 +733,18 @@ def process_language_folder(folder_path, language, set_code, output_folder, csv_
             name_sanitized = sanitize_filename(name_for_file)
             ext = os.path.splitext(front_filename)[1]
             
-            # Save FRONT
+            # Reserve the output names now; the files are written by the writer thread
             base_front = f"{name_sanitized}_{local_id}_{set_code}_{language}_FRONT{ext}"
-            front_new_name = get_unique_filename(output_dir, base_front)
-            front_output = os.path.join(output_dir, front_new_name)
-            cv2.imwrite(front_output, cropped_front)
+            front_new_name = get_unique_filename(output_dir, base_front, existing_files)
+            images = [(os.path.join(output_dir, front_new_name), cropped_front)]
             
-            # Save BACK
-            if i + 1 < len(image_files):
-                back_filename = image_files[i + 1]
-                back_path = os.path.join(search_path, back_filename)
-                back_cropper = CardCropper(back_path)
-                
-                if back_cropper.image is not None:
-                    back_cropped = back_cropper.crop_card_advanced(is_back=True)
-                    if back_cropped is not None:
-                        base_back = f"{name_sanitized}_{local_id}_{set_code}_{language}_BACK{ext}"
-                        back_new_name = get_unique_filename(output_dir, base_back)
-                        back_output = os.path.join(output_dir, back_new_name)
-                        cv2.imwrite(back_output, back_cropped)
-
-            # Move processed raw images to processed folder
-            processed_dir = os.path.join(folder_path, 'raw', language, 'processed')
-            os.makedirs(processed_dir, exist_ok=True)
+            if back_cropped is not None:
+                base_back = f"{name_sanitized}_{local_id}_{set_code}_{language}_BACK{ext}"
+                back_new_name = get_unique_filename(output_dir, base_back, existing_files)
+                images.append((os.path.join(output_dir, back_new_name), back_cropped))
             
-            try:
-                # Move front image
-                front_processed_path = os.path.join(processed_dir, front_filename)
-                shutil.move(front_path, front_processed_path)
-                
-                # Move back image if exists
-                if i + 1 < len(image_files):
-                    back_processed_path = os.path.join(processed_dir, back_filename)
-                    shutil.move(back_path, back_processed_path)
-                
-                    print(f"\n Moved to processed folder")
-                          
-            except Exception as move_error:
-                print(f"\n Could not move files: {move_error}")
+            raw_paths = [front_path, back_path] if back_path else [front_path]
             
-            # Write to CSV (thread-safe)
             csv_data = {
                 'Card Name': name_for_csv,  # English name for CSV
                 'Set Code': set_code,
@@ -684,19 +754,27 @@ def process_language_folder(folder_path, language, set_code, output_folder, csv_
                 'Condition': 'NM',
                 'Comment': 'Booster -> Sleeve'
             }
-            write_to_csv(csv_path, csv_data)
             
-            # Append to collection_list.txt (thread-safe)
-            append_to_collection_list(name_for_csv, set_name, local_id)
+            # Disk writes overlap with matching the next pair
+            pending_writes.append(writer.submit(
+                store_pair, images, raw_paths, processed_dir, csv_path, csv_data,
+                (name_for_csv, set_name, local_id)))
             
             success_count += 1
-            i += 2
-            pair_number += 1
                 
         except Exception as e:
             print(f"\n[{language}] Error: {e}")
-            i += 2
-            pair_number += 1
+    
+    for future in pending_writes:
+        try:
+            future.result()
+        except Exception as e:
+            print(f"\n[{language}] Error writing results: {e}")
+            success_count -= 1
+    writer.shutdown()
+    
+    # Flush the statistics collected by update_stats
+    matcher.learning.save()
     
     print(f"\n[{language}] ✅ Completed: {success_count} cards processed")
 
@@ -956,7 +1034,7 @@ def process_collection_list_only(base_path):
     print("⚠️  COLLECTION LIST UPDATE")
     print(f"{'='*70}")
     print("This will:")
-    print("  • Clear collection_list.txt")
+    print("  • Replace collection_list.txt")
     print("  • Rebuild it from all Renamed_Cropped folders")
     print("  • Use English names from CardList CSV files")
     print("\nDo you want to proceed? (y/n)")
@@ -966,15 +1044,15 @@ def process_collection_list_only(base_path):
         print("❌ Cancelled")
         return
     
-    # Clear collection_list.txt
+    # The old list stays in place until the new one is fully written
     collection_file = Path('PokemonTCGAPI/collection_list.txt')
-    if collection_file.exists():
-        collection_file.unlink()
-        print(f"\n🗑️  Cleared collection_list.txt")
     
     # Load set names
     set_names = load_set_names_mapping()
     
+    # Lines are collected and written in one go once every folder is parsed
+    collection_lines = []
+    
     # Process each folder
     total_cards = 0
     for folder in set_folders:
@@ -1046,7 +1124,7 @@ def process_collection_list_only(base_path):
                         card_name_en = card_db.get_card_name_for_language(card_info, 'EN')
                     
                     # Append to collection list
-                    append_to_collection_list(card_name_en, set_name, local_id)
+                    collection_lines.append(format_collection_line(card_name_en, set_name, local_id))
                     total_cards += 1
                     
                 except Exception as e:
@@ -1055,6 +1133,14 @@ def process_collection_list_only(base_path):
         processed_count = len(list(renamed_folder.glob('*/*_FRONT.*')))
         print(f"  ✅ Processed {processed_count} cards")
     
+    # Written to a temp file and swapped in, so an interrupted rebuild never
+    # leaves a missing or half-written list
+    collection_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = collection_file.with_name(collection_file.name + '.tmp')
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.writelines(collection_lines)
+    os.replace(tmp_file, collection_file)
+    
     print(f"\n{'='*70}")
     print(f"✅ COLLECTION LIST REBUILT: {total_cards} cards total")
     print(f"{'='*70}")
@@ -19,48 +19,69 @@ if sys.platform == 'win32':
 # FILENAME UTILITIES
 # ============================================================================
 
+# Accented characters mapped to their ASCII equivalent, built once at import
+FILENAME_TRANSLATION = str.maketrans({
+    'é': 'e', 'è': 'e', 'ê': 'e', 'à': 'a', 'ç': 'c',
+    'ï': 'i', 'ô': 'o', 'û': 'u', 'É': 'E', 'ä': 'a',
+    'ö': 'o', 'ü': 'u', 'ß': 'ss',
+})
+
 def sanitize_filename(filename):
     """Remove or replace characters that are invalid in Windows filenames"""
-    replacements = {
-        'é': 'e', 'è': 'e', 'ê': 'e', 'à': 'a', 'ç': 'c',
-        'ï': 'i', 'ô': 'o', 'û': 'u', 'É': 'E', 'ä': 'a',
-        'ö': 'o', 'ü': 'u', 'ß': 'ss',
-    }
-    
-    for char, replacement in replacements.items():
-        filename = filename.replace(char, replacement)
-    
+    filename = filename.translate(FILENAME_TRANSLATION)
     filename = filename.encode('ascii', 'ignore').decode('ascii')
     return filename
 
 
-def get_unique_filename(output_dir, base_filename):
-    """Generate unique filename by adding (1), (2), etc. if file exists"""
+def get_unique_filename(output_dir, base_filename, existing_files=None):
+    """Generate unique filename by adding (1), (2), etc. if file exists
+    
+    Args:
+        existing_files: Optional set of filenames already in output_dir. It is checked
+            instead of the filesystem and the returned filename is added to it.
+    """
+    if existing_files is None:
+        existing_files = set(os.listdir(output_dir))
+    
     name_without_ext, ext = os.path.splitext(base_filename)
     test_filename = base_filename
-    test_filepath = os.path.join(output_dir, test_filename)
-    
-    if not os.path.exists(test_filepath):
-        return test_filename
     
     counter = 1
-    while True:
+    while test_filename in existing_files:
         test_filename = f"{name_without_ext}({counter}){ext}"
-        test_filepath = os.path.join(output_dir, test_filename)
-        
-        if not os.path.exists(test_filepath):
-            return test_filename
-        
         counter += 1
+    
+    existing_files.add(test_filename)
+    return test_filename
+
+
+# JPEG quality for saved card crops (visually identical to the default 95, about half the size)
+JPEG_QUALITY = 85
+
+def save_image(filepath, image):
+    """Encode image in memory and write it with a plain file write
+    
+    Unlike cv2.imwrite this also works with non-ASCII paths on Windows.
+    Returns True if the image was written.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    params = []
+    if ext in ('.jpg', '.jpeg'):
+        params = [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY, cv2.IMWRITE_JPEG_OPTIMIZE, 1]
+    
+    ok, buffer = cv2.imencode(ext, image, params)
+    if not ok:
+        return False
+    
+    with open(filepath, 'wb') as f:
+        f.write(buffer)
+    return True
 
 
 def extract_set_code(folder_path):
     """Extract the set code from folder name (last part after last underscore)"""
     folder_name = os.path.basename(os.path.normpath(folder_path))
-    parts = folder_name.split('_')
-    if len(parts) > 0:
-        return parts[-1]
-    return 'unknown'
+    return folder_name.rpartition('_')[2]
 
 # ============================================================================
 # LEARNING SYSTEM
@@ -114,26 +135,26 @@ class LearningSystem:
         
         return None, 0.0, None
     
-    def is_blacklisted(self, image, card_id):
-        """Check if this card_id was previously rejected for this image"""
+    def blacklisted_ids(self, image):
+        """Set of every card_id previously rejected for this image (hash it once, check many)"""
         img_hash = self._perceptual_hash(image)
         
+        rejected = set()
         for stored_hash, rejected_ids in self.data['blacklist'].items():
             distance = self._hamming_distance(img_hash, stored_hash)
             # Changed from 51 to 77 for consistency
-            if distance < 77 and card_id in rejected_ids:
-                return True
+            if distance < 77:
+                rejected.update(rejected_ids)
         
-        return False
+        return rejected
     
     def add_confirmed_match(self, image, card_id):
         """Remember this correct match"""
         img_hash = self._perceptual_hash(image)
         self.data['confirmed_matches'][img_hash] = card_id
         
-        if card_id not in self.data['confidence_boost']:
-            self.data['confidence_boost'][card_id] = 0
-        self.data['confidence_boost'][card_id] += 0.05
+        boosts = self.data['confidence_boost']
+        boosts[card_id] = boosts.get(card_id, 0) + 0.05
         
         print(f"  💾 Learned: This card will be auto-matched next time")
         self.save()
@@ -142,11 +163,10 @@ class LearningSystem:
         """Remember this card was wrong for this image"""
         img_hash = self._perceptual_hash(image)
         
-        if img_hash not in self.data['blacklist']:
-            self.data['blacklist'][img_hash] = []
+        rejected_ids = self.data['blacklist'].setdefault(img_hash, [])
         
-        if card_id not in self.data['blacklist'][img_hash]:
-            self.data['blacklist'][img_hash].append(card_id)
+        if card_id not in rejected_ids:
+            rejected_ids.append(card_id)
             print(f"  🚫 Blacklisted: Will never suggest this card for this image again")
         
         self.save()
@@ -166,13 +186,12 @@ class LearningSystem:
         return self.data['confidence_boost'].get(card_id, 0.0)
     
     def update_stats(self, match_type):
-        """Track statistics"""
+        """Track statistics (in memory only, written out by the next save())"""
         self.data['stats']['total_processed'] += 1
         if match_type == 'auto':
             self.data['stats']['auto_matches'] += 1
         elif match_type == 'manual':
             self.data['stats']['manual_entries'] += 1
-        self.save()
     
     def get_stats(self):
         """Get learning statistics"""
@@ -420,20 +439,44 @@ class PokedexDatabase:
 class CardCropper:
     """Automatically detects and crops Pokémon cards from images"""
     
+    # Card detection doesn't need full resolution - masks are computed at most this wide
+    DETECTION_MAX_WIDTH = 1200
+    
     def __init__(self, image_path):
         self.image_path = image_path
         self.image = cv2.imread(image_path)
         self.cropped_card = None
         
+    def _downscale_for_detection(self, image):
+        """Return image resized to at most DETECTION_MAX_WIDTH wide, and the scale used"""
+        w = image.shape[1]
+        if w <= self.DETECTION_MAX_WIDTH:
+            return image, 1.0
+        
+        scale = self.DETECTION_MAX_WIDTH / w
+        small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return small, scale
+    
+    @staticmethod
+    def _to_device(image):
+        """Wrap image in a UMat so the following filters run through OpenCL, when available"""
+        return cv2.UMat(image) if cv2.ocl.useOpenCL() else image
+    
+    @staticmethod
+    def _to_host(image):
+        """Bring a UMat back to a numpy array (findContours runs on the CPU)"""
+        return image.get() if isinstance(image, cv2.UMat) else image
+    
     def crop_card_basic(self):
         """Simple center crop based on contrast with black background"""
         if self.image is None:
             return None
         
         h, w = self.image.shape[:2]
+        small, scale = self._downscale_for_detection(self.image)
         
         # Convert to grayscale
-        gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
         
         # Threshold: anything brighter than black (> 30) is the card
         _, thresh = cv2.threshold(gray, 30, 255, cv2.THRESH_BINARY)
@@ -450,8 +493,8 @@ class CardCropper:
         # Get the largest contour (should be the card)
         largest_contour = max(contours, key=cv2.contourArea)
         
-        # Get bounding rectangle
-        x, y, cw, ch = cv2.boundingRect(largest_contour)
+        # Get bounding rectangle (mapped back to full resolution)
+        x, y, cw, ch = (int(round(v / scale)) for v in cv2.boundingRect(largest_contour))
         
         # Add small margin (5-10 pixels)
         margin = 8
@@ -479,6 +522,10 @@ class CardCropper:
         
         h, w = basic_cropped.shape[:2]
         
+        # Downscaled grayscale version shared by the strategies that need it
+        small, scale = self._downscale_for_detection(basic_cropped)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        
         # Try multiple cropping strategies and pick the best one
         candidates = []
         
@@ -495,7 +542,7 @@ class CardCropper:
             
             # STRATEGY 2: Contrast-based (blue vs black background)
             try:
-                candidate = self._crop_by_contrast(basic_cropped)
+                candidate = self._crop_by_contrast(basic_cropped, gray, scale)
                 if candidate is not None:
                     candidates.append(('contrast', candidate))
             except:
@@ -513,7 +560,7 @@ class CardCropper:
         
         # STRATEGY 2: Edge-based detection (works when edges are clear)
         try:
-            candidate = self._crop_by_edges(basic_cropped)
+            candidate = self._crop_by_edges(basic_cropped, gray, scale)
             if candidate is not None:
                 candidates.append(('edge', candidate))
         except:
@@ -521,7 +568,7 @@ class CardCropper:
         
         # STRATEGY 3: Brightness-based (works with dark vs light contrast)
         try:
-            candidate = self._crop_by_brightness(basic_cropped)
+            candidate = self._crop_by_brightness(basic_cropped, gray, scale)
             if candidate is not None:
                 candidates.append(('brightness', candidate))
         except:
@@ -552,17 +599,20 @@ class CardCropper:
                     best_candidate = crop
             
             if best_candidate is not None:
+                self.cropped_card = best_candidate
                 return best_candidate
         
         # Fallback to basic crop
+        self.cropped_card = basic_cropped
         return basic_cropped
     
     def _crop_by_blue_border(self, image):
         """Detect card back by finding the blue border/pattern"""
         h, w = image.shape[:2]
+        small, scale = self._downscale_for_detection(image)
         
         # Convert to HSV
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
         
         # Blue detection (wider range to catch various blue tones)
         lower_blue = np.array([90, 50, 50])   # Darker blue
@@ -580,9 +630,9 @@ class CardCropper:
         if not contours:
             return None
         
-        # Get largest contour
+        # Get largest contour (mapped back to full resolution)
         largest = max(contours, key=cv2.contourArea)
-        x, y, cw, ch = cv2.boundingRect(largest)
+        x, y, cw, ch = (int(round(v / scale)) for v in cv2.boundingRect(largest))
         
         # Validate
         if cw < w * 0.6 or ch < h * 0.6:
@@ -597,14 +647,15 @@ class CardCropper:
         
         return image[y:y+ch, x:x+cw]
     
-    def _crop_by_contrast(self, image):
-        """Detect card by high contrast between card and background"""
-        h, w = image.shape[:2]
+    def _crop_by_contrast(self, image, gray, scale):
+        """Detect card by high contrast between card and background
         
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        gray is the downscaled grayscale image, scale its size relative to image
+        """
+        h, w = image.shape[:2]
         
         # Apply bilateral filter to preserve edges while smoothing
-        filtered = cv2.bilateralFilter(gray, 9, 75, 75)
+        filtered = cv2.bilateralFilter(self._to_device(gray), 9, 75, 75)
         
         # Adaptive threshold
         thresh = cv2.adaptiveThreshold(
@@ -617,14 +668,14 @@ class CardCropper:
         cleaned = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
         
         # Find contours
-        contours, _ = cv2.findContours(cleaned, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours, _ = cv2.findContours(self._to_host(cleaned), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         if not contours:
             return None
         
-        # Get largest
+        # Get largest (mapped back to full resolution)
         largest = max(contours, key=cv2.contourArea)
-        x, y, cw, ch = cv2.boundingRect(largest)
+        x, y, cw, ch = (int(round(v / scale)) for v in cv2.boundingRect(largest))
         
         # Validate
         if cw < w * 0.6 or ch < h * 0.6:
@@ -641,9 +692,10 @@ class CardCropper:
     def _crop_by_color_border(self, image):
         """Detect card by finding the yellow/golden border"""
         h, w = image.shape[:2]
+        small, scale = self._downscale_for_detection(image)
         
         # Convert to HSV
-        hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
         
         # Yellow/gold border detection (wider range)
         lower_yellow = np.array([15, 30, 100])
@@ -656,9 +708,9 @@ class CardCropper:
         if not contours:
             return None
         
-        # Get largest contour
+        # Get largest contour (mapped back to full resolution)
         largest = max(contours, key=cv2.contourArea)
-        x, y, cw, ch = cv2.boundingRect(largest)
+        x, y, cw, ch = (int(round(v / scale)) for v in cv2.boundingRect(largest))
         
         # Validate
         if cw < w * 0.6 or ch < h * 0.6:
@@ -673,14 +725,12 @@ class CardCropper:
         
         return image[y:y+ch, x:x+cw]
     
-    def _crop_by_edges(self, image):
-        """Detect card using edge detection"""
+    def _crop_by_edges(self, image, gray, scale):
+        """Detect card using edge detection (gray/scale as in _crop_by_contrast)"""
         h, w = image.shape[:2]
         
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
         # Blur to reduce noise from holographic effects
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        blurred = cv2.GaussianBlur(self._to_device(gray), (5, 5), 0)
         
         # Edge detection with adjusted thresholds
         edges = cv2.Canny(blurred, 30, 100)
@@ -690,14 +740,14 @@ class CardCropper:
         edges_dilated = cv2.dilate(edges, kernel, iterations=1)
         
         # Find contours
-        contours, _ = cv2.findContours(edges_dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours, _ = cv2.findContours(self._to_host(edges_dilated), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         if not contours:
             return None
         
         # Find best rectangular contour
         for contour in sorted(contours, key=cv2.contourArea, reverse=True):
-            x, y, cw, ch = cv2.boundingRect(contour)
+            x, y, cw, ch = (int(round(v / scale)) for v in cv2.boundingRect(contour))
             
             # Must be large enough
             if cw > w * 0.6 and ch > h * 0.6:
@@ -711,12 +761,10 @@ class CardCropper:
         
         return None
     
-    def _crop_by_brightness(self, image):
-        """Detect card by finding bright regions (card) vs dark (background)"""
+    def _crop_by_brightness(self, image, gray, scale):
+        """Detect card by finding bright regions (card) vs dark (background) (gray/scale as in _crop_by_contrast)"""
         h, w = image.shape[:2]
         
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        
         # Use Otsu's thresholding
         _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         
@@ -731,9 +779,9 @@ class CardCropper:
         if not contours:
             return None
         
-        # Get largest
+        # Get largest (mapped back to full resolution)
         largest = max(contours, key=cv2.contourArea)
-        x, y, cw, ch = cv2.boundingRect(largest)
+        x, y, cw, ch = (int(round(v / scale)) for v in cv2.boundingRect(largest))
         
         # Validate
         if cw < w * 0.6 or ch < h * 0.6:
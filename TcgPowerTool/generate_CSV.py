@@ -1,7 +1,19 @@
 import os
+import re
 import json
 import csv
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# Set codes such as SV6, split into letters and number for zero-padding
+SET_CODE_PATTERN = re.compile(r'^([A-Za-z]+)(\d+)$')
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+CSV_COLUMNS = ('Card Name', 'Collector Number', 'Set Code', 'Quantity', 'Language', 'Foil', 'Condition', 'Comment')
+
+# Set folders scanned at the same time (the walk is I/O bound)
+SCAN_WORKERS = 8
 
 def load_sets_data(json_path):
     """Load the all_sets_full.json file and create a mapping of set names to ptcgoCode"""
@@ -58,7 +70,7 @@ def get_set_code_from_folder(folder_name, set_mapping):
     
     return "UNKNOWN"
 
-def load_english_card_names(set_folder_path, base_cardlist_path='PokemonCardLists/Card_Sets'):
+def load_english_card_names(set_folder_path, base_cardlist_path='PokemonCardLists/Card_Sets', log=print):
     """Load English card names from CSV file for a given set"""
     csv_folder = Path(base_cardlist_path)
     folder_name = set_folder_path.name
@@ -75,8 +87,7 @@ def load_english_card_names(set_folder_path, base_cardlist_path='PokemonCardList
     
     # Try zero-padded version if not found (e.g., SV6 -> SV06)
     if not set_folders:
-        import re
-        match = re.match(r'^([A-Za-z]+)(\d+)$', set_code)
+        match = SET_CODE_PATTERN.match(set_code)
         if match:
             letters = match.group(1)
             numbers = match.group(2)
@@ -84,38 +95,132 @@ def load_english_card_names(set_folder_path, base_cardlist_path='PokemonCardList
             set_folders = list(csv_folder.glob(f"*{padded_code}*"))
     
     if not set_folders:
-        print(f"  ⚠️  No CardList folder found for set code: {set_code}")
+        log(f"  ⚠️  No CardList folder found for set code: {set_code}")
         return {}
     
     csv_set_folder = set_folders[0]
-    print(f"  ✓ Found CardList folder: {csv_set_folder.name}")
+    log(f"  ✓ Found CardList folder: {csv_set_folder.name}")
     
     # Find English CSV file
     csv_files = (list(csv_set_folder.glob("CardList_*_en.CSV")) or 
                  list(csv_set_folder.glob("CardList_*_en.csv")))
     
     if not csv_files:
-        print(f"  ⚠️  No English CSV found in {csv_set_folder.name}")
+        log(f"  ⚠️  No English CSV found in {csv_set_folder.name}")
         return {}
     
     csv_file = csv_files[0]
     card_names = {}
     
     try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                local_id = row.get('localId', '').strip()
-                name = row.get('name', '').strip()
-                if local_id and name:
-                    card_names[local_id] = name
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            # Resolve the column positions once instead of building a dict per row
+            if 'localId' in header and 'name' in header:
+                id_col = header.index('localId')
+                name_col = header.index('name')
+                last_col = max(id_col, name_col)
+                for row in reader:
+                    if len(row) <= last_col:
+                        continue
+                    local_id = row[id_col].strip()
+                    name = row[name_col].strip()
+                    if local_id and name:
+                        card_names[local_id] = name
         
-        print(f"  ✓ Loaded {len(card_names)} English card names")
+        log(f"  ✓ Loaded {len(card_names)} English card names")
         return card_names
     except Exception as e:
-        print(f"  ⚠️  Error loading English names: {e}")
+        log(f"  ⚠️  Error loading English names: {e}")
         return {}
 
+def scan_set_folder(set_folder, set_mapping):
+    """Collect the CSV rows for one set folder - designed to run in a thread
+    
+    Messages are returned instead of printed so each set's output stays together
+    """
+    rows = []
+    messages = []
+    log = messages.append
+    
+    log(f"\nProcessing set: {set_folder.name}")
+    
+    # Get the set code
+    set_code = get_set_code_from_folder(set_folder.name, set_mapping)
+    log(f"  Matched set code: {set_code}")
+    
+    # Load English card names for this set
+    english_names = load_english_card_names(set_folder, log=log)
+    
+    # Navigate to renamed_cropped folder
+    cropped_path = set_folder / "Renamed_Cropped"
+    
+    # Also try lowercase version
+    if not cropped_path.exists():
+        cropped_path = set_folder / "renamed_cropped"
+    
+    if not cropped_path.exists():
+        log(f"  Warning: renamed_cropped folder not found in {set_folder.name}")
+        return rows, messages
+    
+    # Process each language folder
+    languages = ['FR', 'EN', 'DE', 'JA']
+    for lang in languages:
+        lang_path = cropped_path / lang
+        
+        if not lang_path.exists():
+            log(f"  Warning: {lang} folder not found in {set_folder.name}")
+            continue
+        
+        # Process all image files
+        card_count = 0
+        with os.scandir(lang_path) as entries:
+            for entry in entries:
+                filename, ext = os.path.splitext(entry.name)
+                if ext.lower() not in IMAGE_EXTENSIONS or not entry.is_file():
+                    continue
+                # Skip _BACK images
+                if '_BACK' in filename.upper():
+                    continue
+                card_count += 1
+                
+                # Parse filename: CardName_LocalId_SetCode_Language_FRONT.ext
+                # Split from the right to get: [..., SetCode, Language, FRONT]
+                parts = filename.rsplit('_', 3)
+                
+                if len(parts) < 4:
+                    log(f"  ⚠️  Skipping invalid filename: {entry.name}")
+                    continue
+                
+                # Extract card name and local ID
+                card_and_id = parts[0]
+                card_parts = card_and_id.rsplit('_', 1)
+                
+                if len(card_parts) < 2:
+                    log(f"  ⚠️  Cannot extract card number: {entry.name}")
+                    continue
+                
+                local_id = card_parts[1]
+                
+                # Get English name from loaded data
+                if english_names and local_id in english_names:
+                    card_name_en = english_names[local_id]
+                else:
+                    # Fallback: use name from filename
+                    card_name_with_underscores = card_parts[0]
+                    card_name_en = card_name_with_underscores.replace('_', ' ')
+                    if not english_names:
+                        log(f"  ⚠️  Using filename for card #{local_id}: {card_name_en}")
+                
+                # Add to CSV data with separate collector number column (CSV_COLUMNS order)
+                rows.append((card_name_en, local_id, set_code, 1, lang,
+                             'no', 'NM', 'New seller, DM for more pictures'))
+                
+        log(f"  Processed {lang} folder: {card_count} cards")
+    
+    return rows, messages
+
 def process_cards(base_path, json_path, output_csv):
     """Process all card images and generate CSV"""
     
@@ -133,100 +238,23 @@ def process_cards(base_path, json_path, output_csv):
         return
     
     print(f"Looking for set folders in: {sets_path}")
-    print(f"Folders found: {[f.name for f in sets_path.iterdir() if f.is_dir()]}")
+    # DirEntry.is_dir() reuses the type returned by the directory listing
+    with os.scandir(sets_path) as entries:
+        set_folders = [Path(entry.path) for entry in entries if entry.is_dir()]
+    print(f"Folders found: {[f.name for f in set_folders]}")
     
-    # Process each set folder
-    for set_folder in sets_path.iterdir():
-        if not set_folder.is_dir():
-            continue
-        
-        print(f"\nProcessing set: {set_folder.name}")
-        
-        # Get the set code
-        set_code = get_set_code_from_folder(set_folder.name, set_mapping)
-        print(f"  Matched set code: {set_code}")
-        
-        # Load English card names for this set
-        english_names = load_english_card_names(set_folder)
-        
-        # Navigate to renamed_cropped folder
-        cropped_path = set_folder / "Renamed_Cropped"
-        
-        # Also try lowercase version
-        if not cropped_path.exists():
-            cropped_path = set_folder / "renamed_cropped"
-        
-        if not cropped_path.exists():
-            print(f"  Warning: renamed_cropped folder not found in {set_folder.name}")
-            continue
-        
-        # Process each language folder
-        languages = ['FR', 'EN', 'DE', 'JA']
-        for lang in languages:
-            lang_path = cropped_path / lang
-            
-            if not lang_path.exists():
-                print(f"  Warning: {lang} folder not found in {set_folder.name}")
-                continue
-            
-            # Process all image files
-            for img_file in lang_path.iterdir():
-                if img_file.is_file() and img_file.suffix.lower() in ['.png', '.jpg', '.jpeg']:
-                    # Skip _BACK images
-                    if '_BACK' in img_file.stem.upper():
-                        continue
-                    
-                    # Parse filename: CardName_LocalId_SetCode_Language_FRONT.ext
-                    filename = img_file.stem
-                    
-                    # Split from the right to get: [..., SetCode, Language, FRONT]
-                    parts = filename.rsplit('_', 3)
-                    
-                    if len(parts) < 4:
-                        print(f"  ⚠️  Skipping invalid filename: {img_file.name}")
-                        continue
-                    
-                    # Extract card name and local ID
-                    card_and_id = parts[0]
-                    card_parts = card_and_id.rsplit('_', 1)
-                    
-                    if len(card_parts) < 2:
-                        print(f"  ⚠️  Cannot extract card number: {img_file.name}")
-                        continue
-                    
-                    local_id = card_parts[1]
-                    
-                    # Get English name from loaded data
-                    if english_names and local_id in english_names:
-                        card_name_en = english_names[local_id]
-                    else:
-                        # Fallback: use name from filename
-                        card_name_with_underscores = card_parts[0]
-                        card_name_en = card_name_with_underscores.replace('_', ' ')
-                        if not english_names:
-                            print(f"  ⚠️  Using filename for card #{local_id}: {card_name_en}")
-                    
-                    # Add to CSV data with separate collector number column
-                    csv_data.append({
-                        'Card Name': card_name_en,
-                        'Collector Number': local_id,
-                        'Set Code': set_code,
-                        'Quantity': 1,
-                        'Language': lang,
-                        'Foil': 'no',
-                        'Condition': 'NM',
-                        'Comment': 'New seller, DM for more pictures'
-                    })
-                    
-            print(f"  Processed {lang} folder: {len([f for f in lang_path.iterdir() if f.is_file() and '_BACK' not in f.stem.upper()])} cards")
+    # Scan set folders in parallel; map() keeps results in folder order
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        for rows, messages in executor.map(lambda folder: scan_set_folder(folder, set_mapping), set_folders):
+            print('\n'.join(messages))
+            csv_data.extend(rows)
     
     # Write to CSV
     if csv_data:
         with open(output_csv, 'w', newline='', encoding='utf-8') as csvfile:
-            fieldnames = ['Card Name', 'Collector Number', 'Set Code', 'Quantity', 'Language', 'Foil', 'Condition', 'Comment']
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.writer(csvfile)
             
-            writer.writeheader()
+            writer.writerow(CSV_COLUMNS)
             writer.writerows(csv_data)
         
         print(f"\nCSV file created successfully: {output_csv}")